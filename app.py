@@ -10,7 +10,7 @@ from enhanced_contact_tagger import EnhancedContactTagger
 from email_service import ReferralEmailService
 from user_management import UserManager
 from email_notifications import EmailNotifier
-from database import init_database, get_organisation_contacts_for_job, get_employee_contacts_for_job, get_organisation_stats
+from database import get_engine_options, init_database, get_organisation_contacts_for_job, get_employee_contacts_for_job, get_organisation_stats
 from models import db, Organisation, User, Contact, EmployeeContact, JobDescription, Referral
 from unified_matcher import UnifiedReferralMatcher
 import pandas as pd
@@ -39,6 +39,7 @@ if not database_url:
     raise ValueError("DATABASE_URL environment variable must be set")
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(database_url)
 
 # Simple session configuration
 app.config['SESSION_COOKIE_NAME'] = 'referral_session'
@@ -4,31 +4,65 @@ Simple Flask web application for the referral matching system.
 Demonstrates how to integrate the unified matcher into a web interface.
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, stream_with_context, g
 from flask_wtf.csrf import CSRFProtect, generate_csrf
+from flask.json.provider import JSONProvider
+from flask.logging import default_handler
+from flask_compress import Compress
 from referral_api import ReferralAPI
 from enhanced_contact_tagger import EnhancedContactTagger
 from email_service import ReferralEmailService
+from task_queue import enqueue_email
+from cache_utils import TTLCache, read_csv_cached, read_csv_fast
 from user_management import UserManager
 from email_notifications import EmailNotifier
-from database import init_database, get_organisation_contacts_for_job, get_employee_contacts_for_job, get_organisation_stats
-from models import db, Organisation, User, Contact, EmployeeContact, JobDescription, Referral, UserSession
+from database import init_database, get_organisation_contacts_for_job, get_organisation_contact_sample, get_organisation_contacts_version, get_employee_contacts_for_job, get_organisation_stats, invalidate_organisation_stats
+from models import db, Organisation, User, Contact, EmployeeContact, JobDescription, Referral, UserSession, link_contacts_to_employee
 from unified_matcher import UnifiedReferralMatcher
+from rapidfuzz import fuzz, process
+from sqlalchemy import exists, insert, lambda_stmt, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased, joinedload
 import pandas as pd
 import os
 import json
+import atexit
+import csv
+import hashlib
+import itertools
+import logging
+import logging.handlers
+import orjson
+import queue
 import time
 import re
 import secrets
-from datetime import datetime, timedelta, timezone
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from werkzeug.http import http_date
 from werkzeug.utils import secure_filename
-from functools import wraps
+from functools import lru_cache, wraps
 import uuid
+import decimal
 
 # Location enrichment temporarily disabled
 # from smart_geo_enricher import SmartGeoEnricher
 
 app = Flask(__name__)
+
+# Log through a queue so request handlers never block on a slow stdout/stderr sink;
+# a background listener thread does the actual writes
+log_queue = queue.SimpleQueue()
+log_stream_handler = logging.StreamHandler()
+log_stream_handler.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+log_listener = logging.handlers.QueueListener(log_queue, log_stream_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
+app.logger.removeHandler(default_handler)
+app.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+app.logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+app.logger.propagate = False
+
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.secret_key = os.environ.get('SECRET_KEY')
@@ -50,6 +84,41 @@ app.config['SESSION_COOKIE_DOMAIN'] = None  # Don't share across subdomains
 # Initialize CSRF protection
 csrf = CSRFProtect(app)
 
+# Compress responses (gzip/br); large contact and import payloads shrink several-fold
+app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/html', 'text/css', 'application/javascript']
+Compress(app)
+
+class ORJSONProvider(JSONProvider):
+    """Serialize jsonify() responses with orjson instead of the stdlib json module."""
+
+    # Dates are passed through to _default so responses keep Flask's HTTP-date format
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    @staticmethod
+    def _default(o):
+        """Handle the types orjson leaves to the caller, matching Flask's default provider."""
+        if isinstance(o, date):
+            return http_date(o)
+        if isinstance(o, (decimal.Decimal, uuid.UUID)):
+            return str(o)
+        if hasattr(o, '__html__'):
+            return str(o.__html__())
+        raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self._default, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Pass orjson's bytes straight through rather than round-tripping via str
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self._default, option=self.OPTIONS)
+        return self._app.response_class(body, mimetype='application/json')
+
+app.json = ORJSONProvider(app)
+
 # HYBRID APPROACH: Allow Flask sessions for CSRF, but use database sessions for authentication
 # This prevents session bleeding while maintaining CSRF protection
 
@@ -61,32 +130,48 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Strict'  # Strict for CSRF protection
 app.config['SESSION_COOKIE_DOMAIN'] = None
 app.config['PERMANENT_SESSION_LIFETIME'] = 3600  # 1 hour for CSRF tokens
 
+# Tagged contacts served in demo mode when no demo organisation exists
+DEMO_CONTACTS_CSV = 'enhanced_tagged_contacts.csv'
+# CSV columns copied onto demo Contact objects, in the order load_contacts_from_csv_demo unpacks them
+DEMO_CONTACT_COLUMNS = ['First Name', 'Last Name', 'Position', 'Company', 'Location', 'LinkedIn URL']
+
 def load_contacts_from_csv_demo():
     """Load demo contacts from CSV for demo mode."""
     try:
-        import pandas as pd
-        csv_file = 'enhanced_tagged_contacts.csv'
-        if os.path.exists(csv_file):
-            df = pd.read_csv(csv_file)
-            # Convert to Contact objects for compatibility
-            contacts = []
-            for _, row in df.iterrows():
-                contact = Contact(
-                    first_name=row.get('First Name', ''),
-                    last_name=row.get('Last Name', ''),
-                    position=row.get('Position', ''),
-                    company=row.get('Company', ''),
-                    location=row.get('Location', ''),
-                    linkedin_url=row.get('LinkedIn URL', '')
-                )
-                contacts.append(contact)
-            return contacts
-        else:
+        # read_csv_cached stats the file anyway, so a missing file needs no separate exists() check
+        try:
+            df = read_csv_cached(DEMO_CONTACTS_CSV)
+        except FileNotFoundError:
             return []
+        
+        # Convert to Contact objects for compatibility; plain tuples avoid building a Series per row
+        columns = df.reindex(columns=DEMO_CONTACT_COLUMNS, fill_value='')
+        return [
+            Contact(
+                first_name=first_name,
+                last_name=last_name,
+                position=position,
+                company=company,
+                location=location,
+                linkedin_url=linkedin_url
+            )
+            for first_name, last_name, position, company, location, linkedin_url
+            in columns.itertuples(index=False, name=None)
+        ]
     except Exception as e:
         print(f"Error loading demo contacts: {e}")
         return []
 
+def stream_json_list(key, items):
+    """Stream a {"success": true, key: [...]} response one item at a time."""
+    def generate():
+        yield '{"success": true, "%s": [' % key
+        for index, item in enumerate(items):
+            yield (',' if index else '') + app.json.dumps(item)
+        yield ']}'
+    
+    return app.response_class(stream_with_context(generate()), mimetype='application/json')
+
 # Security headers
 @app.after_request
 def add_security_headers(response):
@@ -102,10 +187,15 @@ def add_security_headers(response):
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Security utility functions
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+SCRIPT_TAG_RE = re.compile(r'<script.*?</script>', re.IGNORECASE | re.DOTALL)
+JAVASCRIPT_URI_RE = re.compile(r'javascript:', re.IGNORECASE)
+EVENT_HANDLER_RE = re.compile(r'on\w+\s*=', re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
 def validate_email(email):
     """Validate email format."""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return EMAIL_RE.match(email) is not None
 
 def validate_input(text, max_length=1000, allowed_chars=None):
     """Validate and sanitize user input."""
@@ -115,11 +205,12 @@ def validate_input(text, max_length=1000, allowed_chars=None):
     # Remove potentially dangerous characters
     if allowed_chars:
         text = ''.join(c for c in text if c in allowed_chars)
-    else:
+    elif '<' in text or ':' in text or '=' in text:
         # Remove script tags and other potentially dangerous content
-        text = re.sub(r'<script.*?</script>', '', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'javascript:', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'on\w+\s*=', '', text, flags=re.IGNORECASE)
+        # (each pattern needs one of these characters, so plain text skips the regexes)
+        text = SCRIPT_TAG_RE.sub('', text)
+        text = JAVASCRIPT_URI_RE.sub('', text)
+        text = EVENT_HANDLER_RE.sub('', text)
     
     # Limit length
     return text[:max_length].strip()
@@ -137,7 +228,7 @@ def secure_log(message, level="INFO"):
     for pattern in sensitive_patterns:
         message = re.sub(pattern, '[REDACTED]', message, flags=re.IGNORECASE)
     
-    print(f"[{level}] {message}")
+    app.logger.log(logging.getLevelName(level.upper()), message)
 
 def create_database_session(user_id, user_role, organisation_id):
     """Create a new database-backed session."""
@@ -168,6 +259,15 @@ def create_database_session(user_id, user_role, organisation_id):
         db.session.rollback()
         raise
 
+# Validated auth sessions, cached per token as plain values (ORM objects belong to the request
+# that loaded them). validate_session_isolation still re-checks that the session row exists in
+# the same query that loads the user, so a logout on any worker applies on the next request.
+AUTH_SESSION_CACHE_TTL_SECONDS = 30
+_auth_session_cache = TTLCache(AUTH_SESSION_CACHE_TTL_SECONDS, max_entries=10000)
+
+# A session's expiry is pushed out (one UPDATE) at most once per this much activity
+SESSION_EXTEND_INTERVAL = timedelta(minutes=30)
+
 def get_database_session(session_id):
     """Get session data from database."""
     print(f"🔍 DEBUG: get_database_session called with session_id: {session_id}")
@@ -176,6 +276,13 @@ def get_database_session(session_id):
         print(f"❌ DEBUG: No session_id provided")
         return None, None
     
+    cached = _auth_session_cache.get(session_id)
+    if cached is not None:
+        expires_at, session_data = cached
+        # Another worker may have extended the session since, so an expired entry just means re-read it
+        if datetime.now(timezone.utc) <= expires_at:
+            return session_data['user_id'], session_data
+    
     try:
         print(f"🔍 DEBUG: Querying UserSession table for session_id: {session_id}")
         db_session = UserSession.query.filter_by(session_id=session_id).first()
@@ -208,12 +315,16 @@ def get_database_session(session_id):
             db.session.commit()
             return None, None
         
-        print(f"✅ DEBUG: Session is valid, updating last_accessed and extending expiry")
-        
-        # Update last accessed and extend expiry time
-        db_session.last_accessed = current_time
-        db_session.expires_at = current_time + timedelta(hours=8)  # Extend by 8 hours from now
-        db.session.commit()
+        # Update last accessed and extend expiry time, skipping the write if it was done recently
+        last_accessed = db_session.last_accessed
+        if last_accessed is not None and last_accessed.tzinfo is None:
+            last_accessed = last_accessed.replace(tzinfo=timezone.utc)
+        if last_accessed is None or last_accessed < current_time - SESSION_EXTEND_INTERVAL:
+            print(f"✅ DEBUG: Session is valid, updating last_accessed and extending expiry")
+            expires_at_aware = current_time + timedelta(hours=8)  # Extend by 8 hours from now
+            db_session.last_accessed = current_time
+            db_session.expires_at = expires_at_aware
+            db.session.commit()
         
         # Return session data directly from the new model structure
         session_data = {
@@ -222,6 +333,7 @@ def get_database_session(session_id):
             'organisation_id': db_session.organisation_id
         }
         print(f"✅ DEBUG: Session data: {session_data}")
+        _auth_session_cache.set(session_id, (expires_at_aware, session_data))
         return db_session.user_id, session_data
     except Exception as e:
         print(f"❌ DEBUG: Error getting database session: {str(e)}")
@@ -229,6 +341,81 @@ def get_database_session(session_id):
         print(f"❌ DEBUG: Traceback: {traceback.format_exc()}")
         return None, None
 
+def keep_loaded_after_commit():
+    """Stop this request's session expiring loaded objects on commit.
+    
+    For handlers that build their response and emails from rows they just wrote; the
+    session is discarded at the end of the request, so nothing is left stale afterwards.
+    """
+    db.session().expire_on_commit = False
+
+# Hot-path queries built as lambda statements so SQLAlchemy caches their construction
+def get_user_by_id(user_id):
+    """Load a user by primary key, together with their organisation."""
+    stmt = lambda_stmt(lambda: select(User).options(joinedload(User.organisation)).where(User.id == user_id))
+    return db.session.execute(stmt).scalar_one_or_none()
+
+def get_session_user(user_id, session_id):
+    """Load a user (with organisation) only while their auth session row still exists."""
+    stmt = lambda_stmt(lambda: select(User).options(joinedload(User.organisation)).join(
+        UserSession, UserSession.user_id == User.id
+    ).where(User.id == user_id, UserSession.session_id == session_id))
+    return db.session.execute(stmt).scalar_one_or_none()
+
+def end_database_session(session_id):
+    """Delete a database session and evict it from this worker's session cache."""
+    _auth_session_cache.pop(session_id)
+    try:
+        UserSession.query.filter_by(session_id=session_id).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        print(f"❌ DEBUG: Failed to delete database session: {str(e)}")
+        db.session.rollback()
+
+def get_referral_match(contact_id, organisation_id):
+    """Return (contact, employee) for an employee in the organisation who knows the contact, or None."""
+    stmt = lambda_stmt(lambda: select(Contact, User).join(
+        EmployeeContact, EmployeeContact.contact_id == Contact.id
+    ).join(
+        User, User.id == EmployeeContact.employee_id
+    ).where(
+        Contact.id == contact_id,
+        EmployeeContact.organisation_id == organisation_id
+    ).limit(1))
+    return db.session.execute(stmt).first()
+
+# My-referrals lists are cached per user and evicted whenever a referral they take part in changes
+MY_REFERRALS_TTL_SECONDS = 60
+_my_referrals_cache = TTLCache(MY_REFERRALS_TTL_SECONDS)
+
+def invalidate_my_referrals(*user_ids):
+    """Drop cached my-referrals lists for the given users."""
+    for user_id in user_ids:
+        if user_id:
+            _my_referrals_cache.pop(user_id)
+
+# Serialized /api/match results, keyed by the requesting user, a hash of the request body and the
+# organisation's contacts version, so contacts linked by any worker (import, invite, registration)
+# make older entries unreachable.
+MATCH_RESULTS_TTL_SECONDS = 300
+_match_results_cache = TTLCache(MATCH_RESULTS_TTL_SECONDS, max_entries=256)
+
+# Serialized /api/contacts-info bodies (with their ETag) per organisation; evicted alongside
+# the organisation stats when contacts or employees change
+CONTACTS_INFO_TTL_SECONDS = 60
+_contacts_info_cache = TTLCache(CONTACTS_INFO_TTL_SECONDS)
+
+def match_cache_key(session_data, data):
+    """Return the result-cache key for a match request."""
+    payload = orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return (
+        session_data['user_id'],
+        session_data['user_role'],
+        session_data['organisation_id'],
+        hashlib.blake2b(payload, digest_size=16).hexdigest(),
+        tuple(get_organisation_contacts_version(session_data['organisation_id']))
+    )
+
 def validate_session_isolation():
     """Validate that session is properly isolated using database sessions."""
     # Get session ID from cookie
@@ -247,14 +434,16 @@ def validate_session_isolation():
         print("❌ DEBUG: Invalid or expired database session")
         return False, "Invalid or expired session"
     
-    # Verify user still exists
-    user = User.query.get(user_id)
+    # Verify user still exists (and that the session hasn't been ended, possibly by another worker)
+    user = get_session_user(user_id, session_id)
     if not user:
-        print("❌ DEBUG: User not found in database")
+        print("❌ DEBUG: User or session not found in database")
+        _auth_session_cache.pop(session_id)
         return False, "User not found in database"
     
-    # Store session data in request context for use by routes
+    # Store session data and the resolved user in request context for use by routes
     request.session_data = session_data
+    g.current_user = user
     print(f"✅ DEBUG: Valid database session for {user.name} ({user.email})")
     
     return True, f"Valid database session for {user.name} ({user.email})"
@@ -480,7 +669,8 @@ def match_job():
         
         print(f"🔍 DEBUG: Match request - User ID: {user_id}, Role: {user_role}, Org ID: {organisation_id}")
         
-        current_user = User.query.get(user_id)
+        # Resolved (with organisation) by require_auth
+        current_user = getattr(g, 'current_user', None)
         if not current_user:
             print("❌ DEBUG: User not found, using demo mode")
             current_user = None
@@ -489,6 +679,12 @@ def match_job():
             demo_mode = False
             print(f"✅ DEBUG: Valid session for {current_user.name} ({current_user.email}) from {current_user.organisation.name}")
             print(f"✅ DEBUG: User role: {current_user.role}")
+            
+            # Identical repeat requests (e.g. re-running a search) are served from the result cache
+            cache_key = match_cache_key(request.session_data, data)
+            cached_body = _match_results_cache.get(cache_key)
+            if cached_body is not None:
+                return precomputed_json_response(cached_body)
         
         # SECURE: Get contacts based on user role
         try:
@@ -645,12 +841,51 @@ def match_job():
                 candidate_key = f"{candidate.get('First Name', '')}_{candidate.get('Last Name', '')}_{candidate.get('Company', '')}"
                 candidate['contact_id'] = contact_id_map.get(candidate_key, None)
         
-        return jsonify(results)
+        body = app.json.dumps(results)
+        if not demo_mode:
+            _match_results_cache.set(cache_key, body)
+        return precomputed_json_response(body)
             
     except Exception as e:
         print(f"Error in job matching: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+# Lowercased column names that mark a row of an uploaded CSV as the LinkedIn header row
+LINKEDIN_COLUMNS = frozenset({
+    'first name', 'last name', 'full name', 'email', 'company', 
+    'position', 'title', 'current company', 'current position',
+    'firstname', 'lastname', 'fullname', 'emailaddress', 'companyname',
+    'jobtitle', 'currentcompany', 'currentposition'
+})
+
+# LinkedIn exports put a few lines of notes above the header; only scan this many rows for it
+CSV_HEADER_SCAN_ROWS = 10
+
+# Common LinkedIn column name variations -> the names the tagger expects
+COLUMN_MAPPING = {
+    'first name': 'First Name',
+    'last name': 'Last Name', 
+    'full name': 'Full Name',
+    'email address': 'Email Address',
+    'emailaddress': 'Email Address',
+    'company name': 'Company',
+    'companyname': 'Company',
+    'job title': 'Position',
+    'jobtitle': 'Position',
+    'current company': 'Company',
+    'currentcompany': 'Company',
+    'current position': 'Position',
+    'currentposition': 'Position',
+    'connected on': 'Connected On'
+}
+
+# Response summary key -> tag column counted in the import summary
+TAGGING_SUMMARY_COLUMNS = {
+    'roles': 'role_tag',
+    'functions': 'function_tag',
+    'seniority': 'seniority_tag',
+}
+
 @app.route('/api/import-contacts', methods=['POST'])
 @require_auth
 def import_contacts():
@@ -675,51 +910,41 @@ def import_contacts():
                 'error': 'Please upload a CSV file'
             }), 400
         
-        # Save uploaded file
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
         
         # Load and process contacts
         print(f"📄 Processing uploaded file: {filename}")
         
         # Smart CSV parsing to handle LinkedIn export format
-        def smart_read_csv(filepath):
+        def smart_read_csv(stream):
             """Intelligently read CSV file, detecting header row and skipping intro text."""
             try:
-                # First, read the first few lines to understand the structure
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()[:10]  # Read first 10 lines
+                # First, parse just the first few rows to understand the structure
+                # (csv.reader handles quoted commas, e.g. in Position)
+                lines = (line.decode('utf-8') for line in stream)
+                rows = list(itertools.islice(csv.reader(lines), CSV_HEADER_SCAN_ROWS))
+                stream.seek(0)
                 
                 # Look for the header row by checking for common LinkedIn column names
-                linkedin_columns = [
-                    'first name', 'last name', 'full name', 'email', 'company', 
-                    'position', 'title', 'current company', 'current position',
-                    'firstname', 'lastname', 'fullname', 'emailaddress', 'companyname',
-                    'jobtitle', 'currentcompany', 'currentposition'
-                ]
-                
                 header_row = 0
-                for i, line in enumerate(lines):
-                    # Convert to lowercase and split by comma
-                    columns = [col.strip().lower().replace('"', '') for col in line.split(',')]
+                for i, row in enumerate(rows):
+                    columns = [col.strip().lower() for col in row]
                     
-                    # Check if this line contains LinkedIn-like column headers
-                    if any(col in linkedin_columns for col in columns):
+                    # Check if this row contains LinkedIn-like column headers
+                    if not LINKEDIN_COLUMNS.isdisjoint(columns):
                         header_row = i
                         print(f"🔍 Detected header row at line {i + 1}: {columns[:5]}...")
                         break
                 
                 # If no clear header found, try to detect by looking for data patterns
                 if header_row == 0:
-                    for i, line in enumerate(lines):
-                        # Skip empty lines or lines that are clearly not data
-                        if not line.strip() or len(line.split(',')) < 3:
+                    for i, columns in enumerate(rows):
+                        # Skip empty rows or rows that are clearly not data
+                        if len(columns) < 3 or not any(col.strip() for col in columns):
                             continue
                         
                         # Check if this looks like a data row (has reasonable content)
-                        columns = line.split(',')
-                        if len(columns) >= 3 and any(len(col.strip()) > 2 for col in columns[:3]):
+                        if any(len(col.strip()) > 2 for col in columns[:3]):
                             # This might be the header row
                             header_row = i
                             print(f"🔍 Inferred header row at line {i + 1}")
@@ -729,33 +954,16 @@ def import_contacts():
                 if header_row > 0:
                     print(f"📊 Reading CSV with header at row {header_row + 1}")
                     # Skip rows before the header, then read with header=0
-                    df = pd.read_csv(filepath, header=0, skiprows=header_row)
+                    df = read_csv_fast(stream, header=0, skiprows=header_row)
                 else:
                     print("📊 Reading CSV with default header (row 1)")
-                    df = pd.read_csv(filepath)
+                    df = read_csv_fast(stream)
                 
                 # Clean up column names (strip whitespace but preserve case)
                 df.columns = df.columns.str.strip()
                 
                 # Handle common LinkedIn column name variations
-                column_mapping = {
-                    'first name': 'First Name',
-                    'last name': 'Last Name', 
-                    'full name': 'Full Name',
-                    'email address': 'Email Address',
-                    'emailaddress': 'Email Address',
-                    'company name': 'Company',
-                    'companyname': 'Company',
-                    'job title': 'Position',
-                    'jobtitle': 'Position',
-                    'current company': 'Company',
-                    'currentcompany': 'Company',
-                    'current position': 'Position',
-                    'currentposition': 'Position',
-                    'connected on': 'Connected On'
-                }
-                
-                df = df.rename(columns=column_mapping)
+                df = df.rename(columns=COLUMN_MAPPING)
                 
                 print(f"✅ Successfully loaded {len(df)} contacts with columns: {list(df.columns)}")
                 return df
@@ -764,29 +972,23 @@ def import_contacts():
                 print(f"❌ Error in smart CSV parsing: {str(e)}")
                 # Fallback to standard pandas reading
                 print("🔄 Falling back to standard CSV reading...")
-                return pd.read_csv(filepath)
+                stream.seek(0)
+                return read_csv_fast(stream)
         
-        contacts_df = smart_read_csv(filepath)
+        # Parse the upload straight from its stream rather than saving a copy to disk first
+        contacts_df = smart_read_csv(file.stream)
         
         # Tag contacts
         tagged_df = tagger.tag_contacts(contacts_df)
         
-        # Get current user's organization
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify({'error': 'Not authenticated'}), 401
-        
-        current_user = User.query.get(user_id)
-        if not current_user:
-            return jsonify({'error': 'User not found'}), 404
-        
         # Use current user's organization
+        current_user = g.current_user
         user_org = current_user.organisation
         if not user_org:
             return jsonify({'error': 'No organisation found'}), 500
         
         # Store contacts in database
-        stored_count = 0
+        employee_links = {}
         for _, row in tagged_df.iterrows():
             try:
                 contact_data = {
@@ -817,47 +1019,42 @@ def import_contacts():
                     db.session.add(contact)
                     db.session.flush()
                 
-                # Check if this employee-contact relationship already exists
-                existing_relationship = EmployeeContact.query.filter_by(
-                    employee_id=current_user.id,
-                    contact_id=contact.id
-                ).first()
-                
-                if not existing_relationship:
-                    # Link to this employee at this organisation
-                    employee_contact = EmployeeContact(
-                        employee_id=current_user.id,
-                        contact_id=contact.id,
-                        organisation_id=user_org.id,
-                        relationship_type='linkedin_connection'
-                    )
-                    db.session.add(employee_contact)
-                    stored_count += 1
-                else:
-                    print(f"Contact {contact.first_name} {contact.last_name} already linked to employee")
+                # Link to this employee at this organisation (deduplicated per upload)
+                employee_links[contact.id] = {
+                    'employee_id': current_user.id,
+                    'contact_id': contact.id,
+                    'organisation_id': user_org.id,
+                    'relationship_type': 'linkedin_connection'
+                }
                 
             except Exception as e:
                 print(f"Error storing contact {row.get('First Name', 'Unknown')}: {e}")
                 continue
         
+        # Existing employee-contact links are skipped by the unique constraint, and a bad link skips only itself
+        stored_count = link_contacts_to_employee(list(employee_links.values()))
         db.session.commit()
+        invalidate_organisation_stats(user_org.id)
+        _contacts_info_cache.pop(user_org.id)
+        _match_results_cache.clear()
         
-        # Get summary statistics
-        summary = tagger._print_tagging_summary(tagged_df)
+        # The console summary re-parses every skills/platforms JSON cell, so only print it in debug
+        if app.debug:
+            tagger._print_tagging_summary(tagged_df)
         
-        # Clean up uploaded file
-        os.remove(filepath)
+        # Get summary statistics
+        summary_df = tagged_df[list(TAGGING_SUMMARY_COLUMNS.values())]
+        summary = {
+            key: summary_df[column].value_counts().to_dict()
+            for key, column in TAGGING_SUMMARY_COLUMNS.items()
+        }
         
         return jsonify({
             'success': True,
             'message': f'Successfully stored {stored_count} contacts in database',
             'contacts_processed': stored_count,
             'organisation': user_org.name,
-            'summary': {
-                'roles': tagged_df['role_tag'].value_counts().to_dict(),
-                'functions': tagged_df['function_tag'].value_counts().to_dict(),
-                'seniority': tagged_df['seniority_tag'].value_counts().to_dict()
-            }
+            'summary': summary
         })
         
     except Exception as e:
@@ -879,10 +1076,7 @@ def get_contacts_for_enrichment():
         # Load the user's contacts from the most recent import
         contacts = user_manager.get_user_contacts_for_enrichment(user_id)
         
-        return jsonify({
-            'success': True,
-            'contacts': contacts
-        })
+        return stream_json_list('contacts', contacts)
         
     except Exception as e:
         return jsonify({
@@ -944,12 +1138,10 @@ def send_referral_emails():
             return jsonify({'error': 'No contacts provided'}), 400
         
         # Group contacts by employee
-        contacts_by_employee = {}
+        contacts_by_employee = defaultdict(list)
         for contact in contacts:
             employee = contact.get('employee_connection')
             if employee:
-                if employee not in contacts_by_employee:
-                    contacts_by_employee[employee] = []
                 contacts_by_employee[employee].append(contact)
         
         if not contacts_by_employee:
@@ -996,61 +1188,24 @@ def db_status():
 
 @app.route('/api/migrate-database', methods=['GET', 'POST'])
 def migrate_database():
-    """Run database migration to add missing columns."""
+    """Report the applied schema version (migrations run at deploy via `alembic upgrade head`)."""
     try:
-        from sqlalchemy import text
+        from alembic.runtime.migration import MigrationContext
         
-        print("🔧 Starting database migration...")
-        
-        # Check if from_email column exists and add it if missing
-        result = db.session.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'organisations' 
-            AND column_name = 'from_email'
-        """))
-        
-        if not result.fetchone():
-            print("➕ Adding from_email column to organisations table...")
-            db.session.execute(text("ALTER TABLE organisations ADD COLUMN from_email VARCHAR(255)"))
-            db.session.commit()
-            print("✅ Added from_email column")
-        else:
-            print("✅ from_email column already exists")
-        
-        # Check if from_name column exists and add it if missing
-        result = db.session.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'organisations' 
-            AND column_name = 'from_name'
-        """))
-        
-        if not result.fetchone():
-            print("➕ Adding from_name column to organisations table...")
-            db.session.execute(text("ALTER TABLE organisations ADD COLUMN from_name VARCHAR(255)"))
-            db.session.commit()
-            print("✅ Added from_name column")
-        else:
-            print("✅ from_name column already exists")
-        
-        # Test the migration
-        print("🧪 Testing migration...")
-        org_count = Organisation.query.count()
-        print(f"✅ Migration successful! Found {org_count} organisations")
+        context = MigrationContext.configure(db.session.connection())
+        version = context.get_current_revision()
         
         return jsonify({
             'success': True,
-            'message': 'Database migration completed successfully',
-            'organisations_count': org_count
+            'message': 'Schema migrations are applied at deploy time',
+            'schema_version': version
         })
         
     except Exception as e:
-        db.session.rollback()
-        secure_log(f"Database migration failed: {str(e)}", "ERROR")
+        secure_log(f"Schema version check failed: {str(e)}", "ERROR")
         return jsonify({
             'success': False,
-            'error': f'Migration failed: {str(e)}'
+            'error': f'Schema version check failed: {str(e)}'
         }), 500
 
 @app.route('/api/stats')
@@ -1070,6 +1225,166 @@ def view_referral(referral_id):
     csrf_token = generate_csrf()
     return render_template('referral_detail.html', referral_id=referral_id, csrf_token=csrf_token)
 
+# Headers to mimic a real browser when fetching job pages
+JOB_FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# Timeout budget for job page fetches: (connect, read) in seconds.
+# A slow upstream gives up well before a worker is tied up for long.
+JOB_FETCH_TIMEOUT = (3.05, 7)
+
+# Job pages are truncated after this many bytes; descriptions sit well inside it
+JOB_FETCH_MAX_BYTES = 2 * 1024 * 1024
+JOB_FETCH_CHUNK_BYTES = 64 * 1024
+
+# Shared session so repeat fetches from the same job site reuse their TCP/TLS connections
+_job_fetch_session = None
+
+def get_job_fetch_session():
+    """Return the pooled HTTP session used for job page fetches, creating it on first use."""
+    global _job_fetch_session
+    if _job_fetch_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        http = requests.Session()
+        http.headers.update(JOB_FETCH_HEADERS)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+        http.mount('https://', adapter)
+        http.mount('http://', adapter)
+        _job_fetch_session = http
+    return _job_fetch_session
+
+def fetch_job_page(url):
+    """Fetch a job page and return the raw response body, capped at JOB_FETCH_MAX_BYTES."""
+    with get_job_fetch_session().get(url, timeout=JOB_FETCH_TIMEOUT, stream=True) as response:
+        response.raise_for_status()
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=JOB_FETCH_CHUNK_BYTES):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= JOB_FETCH_MAX_BYTES:
+                break
+        return b''.join(chunks)[:JOB_FETCH_MAX_BYTES]
+
+# Runs of whitespace collapsed when normalising scraped page text
+WHITESPACE_RE = re.compile(r'\s+')
+
+# A content block this long is taken as the full job description
+JOB_DESCRIPTION_BLOCK_CHARS = 2000
+
+# Elements not parsed from job pages. Children of <html>/<head> (e.g. <title>) are still
+# considered one by one, while <body> and everything else is kept whole
+JOB_PAGE_SKIPPED_TAGS = frozenset(('html', 'head', 'script', 'style'))
+
+def is_job_page_tag(name, attrs=None):
+    """SoupStrainer filter for job pages: keep every element except the skipped ones."""
+    return name not in JOB_PAGE_SKIPPED_TAGS
+
+# Cookie-banner / apply-button words scrubbed from extracted job descriptions
+JOB_ARTIFACT_RE = re.compile(r'(cookie|privacy|terms|conditions|apply|application)', re.IGNORECASE)
+
+# Application-form prefixes stripped from scraped job titles
+JOB_TITLE_PREFIX_RE = re.compile(r'^(job application for|application for|apply for)\s*', re.IGNORECASE)
+
+# Page titles like "Job Title - Company", "Job Title | Company" or "Job Title at Company"
+TITLE_RE = re.compile(r'([^-|]+?)(?:\s*[-|]\s*|\s+at\s+)([^-|]+)')
+
+# lxml's C parser builds the tree several times faster than html.parser
+try:
+    import lxml  # noqa: F401
+    JOB_PAGE_PARSER = 'lxml'
+except ImportError:
+    JOB_PAGE_PARSER = 'html.parser'
+
+# Page-scraping selectors, highest priority first
+LINKEDIN_TITLE_SELECTORS = (
+    'h1[class*="job-title"]',
+    'h1[class*="title"]',
+    '.job-title',
+    '.title',
+    'h1'
+)
+LINKEDIN_COMPANY_SELECTORS = (
+    '[class*="company"]',
+    '[class*="employer"]',
+    '.company-name',
+    '.employer-name'
+)
+LINKEDIN_DESC_SELECTORS = (
+    '[class*="description"]',
+    '[class*="details"]',
+    '.job-description',
+    '.description',
+    '.details'
+)
+QUALTRICS_DESC_SELECTORS = (
+    '[class*="description"]',
+    '[class*="details"]',
+    '[class*="content"]',
+    '[class*="job"]',
+    '.job-description',
+    '.description',
+    '.details',
+    'main',
+    'article',
+    'section',
+    'div[class*="body"]',
+    'div[class*="text"]'
+)
+QUALTRICS_DESC_SELECTOR = ', '.join(QUALTRICS_DESC_SELECTORS)
+QUALTRICS_TITLE_SELECTORS = (
+    'h1',
+    '[class*="title"]',
+    '[class*="job-title"]',
+    '.job-title',
+    '.title',
+    '[class*="position"]',
+    '[class*="role"]',
+    'h2',
+    'h3'
+)
+
+# Phrases meaning the posting is closed (whole page) or that a heading is an error message
+JOB_INACTIVE_PHRASES = (
+    'job has been filled', 'position has been filled', 'no longer accepting applications',
+    'position closed', 'we\'re sorry'
+)
+JOB_ERROR_TITLE_PHRASES = (
+    'we\'re sorry', 'job has been filled', 'position has been filled',
+    'no longer accepting', 'position closed'
+)
+
+# Paragraphs mentioning any of these are kept from generic career pages
+JOB_DESCRIPTION_KEYWORDS = (
+    'job description', 'role description', 'position description', 
+    'responsibilities', 'requirements', 'qualifications', 'about this role'
+)
+
+def iter_priority_matches(soup, selectors):
+    """Yield (selector, element) pairs in selector priority order using a single DOM walk."""
+    import soupsieve as sv
+    # One traversal for the whole union, then rank the candidates by selector priority
+    candidates = soup.select(', '.join(selectors))
+    for selector in selectors:
+        pattern = sv.compile(selector)
+        for elem in candidates:
+            if pattern.match(elem):
+                yield selector, elem
+                break
+
+def select_first_by_priority(soup, selectors):
+    """Return the first element matching the highest-priority selector, or None."""
+    for _, elem in iter_priority_matches(soup, selectors):
+        return elem
+    return None
+
 @app.route('/api/fetch-job', methods=['POST'])
 @require_auth
 def fetch_job_description():
@@ -1090,6 +1405,7 @@ def fetch_job_description():
             }), 400
             
         url = data.get('url', '').strip()
+        url_lower = url.lower()
         
         if not url:
             return jsonify({
@@ -1100,7 +1416,7 @@ def fetch_job_description():
         # Import requests here to avoid issues if not installed
         try:
             import requests
-            from bs4 import BeautifulSoup
+            from bs4 import BeautifulSoup, SoupStrainer
             import re
         except ImportError:
             return jsonify({
@@ -1108,22 +1424,11 @@ def fetch_job_description():
                 'error': 'Web scraping dependencies not installed. Please install: pip install requests beautifulsoup4'
             }), 500
         
-        # Set up headers to mimic a real browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
+        # Fetch the page within the timeout budget
+        content = fetch_job_page(url)
         
-        # Fetch the page
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # Parse with BeautifulSoup
-        soup = BeautifulSoup(response.content, 'html.parser')
+        # Parse with BeautifulSoup, skipping head scripts and stylesheets
+        soup = BeautifulSoup(content, JOB_PAGE_PARSER, parse_only=SoupStrainer(is_job_page_tag))
         
         # Remove script and style elements
         for script in soup(["script", "style"]):
@@ -1132,10 +1437,8 @@ def fetch_job_description():
         # Get text content
         text = soup.get_text()
         
-        # Clean up the text
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
+        # Clean up the text (collapse all whitespace runs in one pass)
+        text = WHITESPACE_RE.sub(' ', text).strip()
         
         # Extract job-specific content based on URL type
         job_description = ""
@@ -1143,81 +1446,39 @@ def fetch_job_description():
         company = ""
         
         # LinkedIn job pages
-        if 'linkedin.com/jobs' in url:
+        if 'linkedin.com/jobs' in url_lower:
             # Look for job title
-            title_selectors = [
-                'h1[class*="job-title"]',
-                'h1[class*="title"]',
-                '.job-title',
-                '.title',
-                'h1'
-            ]
-            for selector in title_selectors:
-                title_elem = soup.select_one(selector)
-                if title_elem:
-                    job_title = title_elem.get_text().strip()
-                    break
+            title_elem = select_first_by_priority(soup, LINKEDIN_TITLE_SELECTORS)
+            if title_elem:
+                job_title = title_elem.get_text().strip()
             
             # Look for company name
-            company_selectors = [
-                '[class*="company"]',
-                '[class*="employer"]',
-                '.company-name',
-                '.employer-name'
-            ]
-            for selector in company_selectors:
-                company_elem = soup.select_one(selector)
-                if company_elem:
-                    company = company_elem.get_text().strip()
-                    break
+            company_elem = select_first_by_priority(soup, LINKEDIN_COMPANY_SELECTORS)
+            if company_elem:
+                company = company_elem.get_text().strip()
             
             # Extract job description (look for common patterns)
-            desc_selectors = [
-                '[class*="description"]',
-                '[class*="details"]',
-                '.job-description',
-                '.description',
-                '.details'
-            ]
-            for selector in desc_selectors:
-                desc_elem = soup.select_one(selector)
-                if desc_elem:
-                    job_description = desc_elem.get_text().strip()
-                    break
+            desc_elem = select_first_by_priority(soup, LINKEDIN_DESC_SELECTORS)
+            if desc_elem:
+                job_description = desc_elem.get_text().strip()
         
         # Generic company career pages
         else:
             # Qualtrics-specific scraping
-            if 'qualtrics.com' in url:
-                # Look for Qualtrics-specific content structure
-                job_content = []
-                
-                # Look for job description in common Qualtrics patterns
-                desc_selectors = [
-                    '[class*="description"]',
-                    '[class*="details"]',
-                    '[class*="content"]',
-                    '[class*="job"]',
-                    '.job-description',
-                    '.description',
-                    '.details',
-                    'main',
-                    'article',
-                    'section',
-                    'div[class*="body"]',
-                    'div[class*="text"]'
-                ]
-                
-                for selector in desc_selectors:
-                    elements = soup.select(selector)
-                    for elem in elements:
-                        text = elem.get_text().strip()
-                        if len(text) > 100:  # Only consider substantial content
-                            job_content.append(text)
+            if 'qualtrics.com' in url_lower:
+                # Look for job description in common Qualtrics patterns;
+                # one DOM walk for all selectors, keeping the longest substantial block seen
+                # and stopping once a full description block is found
+                longest_content = ''
+                for elem in soup.select(QUALTRICS_DESC_SELECTOR):
+                    elem_text = elem.get_text().strip()
+                    if len(elem_text) > 100 and len(elem_text) > len(longest_content):  # Only consider substantial content
+                        longest_content = elem_text
+                        if len(elem_text) > JOB_DESCRIPTION_BLOCK_CHARS:
+                            break
                 
-                if job_content:
-                    # Take the longest content block as the job description
-                    job_description = max(job_content, key=len)
+                if longest_content:
+                    job_description = longest_content
                 else:
                     # Fallback: try to extract from the entire page content
                     # Remove navigation, headers, footers
@@ -1230,37 +1491,21 @@ def fetch_job_description():
                         job_description = remaining_text[:3000]  # Take first 3000 chars
                 
                 # Extract job title from Qualtrics page
-                title_selectors = [
-                    'h1',
-                    '[class*="title"]',
-                    '[class*="job-title"]',
-                    '.job-title',
-                    '.title',
-                    '[class*="position"]',
-                    '[class*="role"]',
-                    'h2',
-                    'h3'
-                ]
-                
-                for selector in title_selectors:
-                    title_elem = soup.select_one(selector)
-                    if title_elem:
-                        potential_title = title_elem.get_text().strip()
-                        print(f"🔍 Debug - Found title with selector '{selector}': {potential_title}")
-                        
-                        # Skip if this looks like an error message
-                        if any(phrase in potential_title.lower() for phrase in [
-                            'we\'re sorry', 'job has been filled', 'position has been filled',
-                            'no longer accepting', 'position closed'
-                        ]):
-                            print(f"🔍 Debug - Skipping error message title: {potential_title}")
-                            continue
-                        
-                        job_title = potential_title
-                        break
+                for selector, title_elem in iter_priority_matches(soup, QUALTRICS_TITLE_SELECTORS):
+                    potential_title = title_elem.get_text().strip()
+                    app.logger.debug("🔍 Debug - Found title with selector '%s': %s", selector, potential_title)
+                    
+                    # Skip if this looks like an error message
+                    potential_title_lower = potential_title.lower()
+                    if any(phrase in potential_title_lower for phrase in JOB_ERROR_TITLE_PHRASES):
+                        app.logger.debug("🔍 Debug - Skipping error message title: %s", potential_title)
+                        continue
+                    
+                    job_title = potential_title
+                    break
                 
                 # If no title found, try to extract from URL
-                if not job_title and 'qualtrics.com' in url:
+                if not job_title:
                     # Extract from URL path
                     url_parts = url.split('/')
                     for part in url_parts:
@@ -1269,7 +1514,7 @@ def fetch_job_description():
                             potential_title = part.replace('-', ' ').title()
                             if 'sales' in potential_title.lower() or 'development' in potential_title.lower():
                                 job_title = potential_title
-                                print(f"🔍 Debug - Extracted title from URL: {job_title}")
+                                app.logger.debug("🔍 Debug - Extracted title from URL: %s", job_title)
                                 break
                 
                 # Extract company name
@@ -1277,41 +1522,40 @@ def fetch_job_description():
             
             # Generic scraping for other companies
             else:
-                # Look for common job description patterns
-                job_keywords = ['job description', 'role description', 'position description', 
-                              'responsibilities', 'requirements', 'qualifications', 'about this role']
-                
                 # Find paragraphs containing job-related content
                 paragraphs = soup.find_all(['p', 'div', 'section'])
                 job_content = []
                 
                 for p in paragraphs:
                     p_text = p.get_text().strip()
-                    if any(keyword in p_text.lower() for keyword in job_keywords):
+                    p_text_lower = p_text.lower()
+                    if any(keyword in p_text_lower for keyword in JOB_DESCRIPTION_KEYWORDS):
                         job_content.append(p_text)
                 
                 if job_content:
                     job_description = '\n\n'.join(job_content)
                 
                 # Try to extract job title from page title or headings
-                page_title = soup.find('title')
+                page_title = soup.title
                 if page_title:
                     title_text = page_title.get_text()
                     # Look for patterns like "Job Title - Company" or "Job Title at Company"
-                    title_match = re.search(r'([^-|]+?)(?:\s*[-|]\s*|\s+at\s+)([^-|]+)', title_text)
+                    title_match = TITLE_RE.search(title_text)
                     if title_match:
                         job_title = title_match.group(1).strip()
                         company = title_match.group(2).strip()
         
-        # Debug: Print what we found
-        print(f"🔍 Debug - URL: {url}")
-        print(f"🔍 Debug - Page title: {soup.find('title').get_text() if soup.find('title') else 'No title found'}")
-        print(f"🔍 Debug - Text length: {len(text)}")
-        print(f"🔍 Debug - First 200 chars: {text[:200]}")
+        # Debug: Log what we found
+        if app.logger.isEnabledFor(logging.DEBUG):
+            title_tag = soup.title
+            app.logger.debug("🔍 Debug - URL: %s", url)
+            app.logger.debug("🔍 Debug - Page title: %s", title_tag.get_text() if title_tag else 'No title found')
+            app.logger.debug("🔍 Debug - Text length: %d", len(text))
+            app.logger.debug("🔍 Debug - First 200 chars: %s", text[:200])
         
         # Check for common scraping issues
         if len(text) < 100:
-            if 'workday' in url.lower() or 'myworkdayjobs' in url.lower():
+            if 'workday' in url_lower:
                 return jsonify({
                     'success': False,
                     'error': 'This job posting uses Workday (requires JavaScript). Please copy the job description manually or try the LinkedIn version of this posting.',
@@ -1331,7 +1575,8 @@ def fetch_job_description():
                 }), 400
         
         # Check if the job posting is no longer active (do this early)
-        if any(phrase in text.lower() for phrase in ['job has been filled', 'position has been filled', 'no longer accepting applications', 'position closed', 'we\'re sorry']):
+        text_lower = text.lower()
+        if any(phrase in text_lower for phrase in JOB_INACTIVE_PHRASES):
             return jsonify({
                 'success': False,
                 'error': 'This job posting is no longer active or has been filled. Please try a different job posting or paste the job description manually.',
@@ -1349,15 +1594,15 @@ def fetch_job_description():
         # Clean up the job description
         if job_description:
             # Remove excessive whitespace
-            job_description = re.sub(r'\s+', ' ', job_description)
+            job_description = WHITESPACE_RE.sub(' ', job_description)
             # Remove common web artifacts
-            job_description = re.sub(r'(cookie|privacy|terms|conditions|apply|application)', '', job_description, flags=re.IGNORECASE)
+            job_description = JOB_ARTIFACT_RE.sub('', job_description)
             job_description = job_description.strip()
         
         # Clean up job title - remove common prefixes
         if job_title:
             # Remove common prefixes
-            job_title = re.sub(r'^(job application for|application for|apply for)\s*', '', job_title, flags=re.IGNORECASE)
+            job_title = JOB_TITLE_PREFIX_RE.sub('', job_title)
             job_title = job_title.strip()
             
             # Try to match to known roles for better consistency
@@ -1383,83 +1628,104 @@ def fetch_job_description():
             'error': f'Error processing URL: {str(e)}'
         }), 500
 
+# Known role mappings (canonical names)
+KNOWN_ROLES = {
+    'customer success manager': 'Customer Success Manager',
+    'csm': 'Customer Success Manager',
+    'account executive': 'Account Executive',
+    'ae': 'Account Executive',
+    'sales development representative': 'Sales Development Representative',
+    'sdr': 'Sales Development Representative',
+    'business development representative': 'Business Development Representative',
+    'bdr': 'Business Development Representative',
+    'sales representative': 'Sales Representative',
+    'sales rep': 'Sales Representative',
+    'software engineer': 'Software Engineer',
+    'developer': 'Software Engineer',
+    'product manager': 'Product Manager',
+    'pm': 'Product Manager',
+    'data scientist': 'Data Scientist',
+    'ml engineer': 'Data Scientist',
+    'machine learning engineer': 'Data Scientist',
+    'marketing manager': 'Marketing Manager',
+    'financial planning & analysis manager': 'Financial Planning & Analysis Manager',
+    'fp&a manager': 'Financial Planning & Analysis Manager',
+    'revenue operations manager': 'Revenue Operations Manager',
+    'revops manager': 'Revenue Operations Manager',
+    'gtm finance manager': 'GTM Finance Manager',
+    'go-to-market finance manager': 'GTM Finance Manager',
+    'strategic finance manager': 'Strategic Finance Manager',
+    'business finance manager': 'Business Finance Manager',
+    'financial operations manager': 'Financial Operations Manager',
+    'revenue strategy manager': 'Revenue Strategy Manager',
+    'business intelligence manager': 'Business Intelligence Manager',
+    'bi manager': 'Business Intelligence Manager',
+    'data analytics manager': 'Data Analytics Manager',
+    'analytics manager': 'Data Analytics Manager',
+    'corporate finance manager': 'Corporate Finance Manager',
+    'strategy manager': 'Strategy Manager',
+    'business strategy manager': 'Business Strategy Manager',
+    'strategic planning manager': 'Strategic Planning Manager',
+    'corporate strategy manager': 'Corporate Strategy Manager',
+    'business development manager': 'Business Development Manager',
+    'strategic initiatives manager': 'Strategic Initiatives Manager',
+    'business operations manager': 'Business Operations Manager',
+    'strategic partnerships manager': 'Strategic Partnerships Manager',
+    'operations manager': 'Operations Manager',
+    'process improvement manager': 'Process Improvement Manager',
+    'operational excellence manager': 'Operational Excellence Manager',
+    'business process manager': 'Business Process Manager',
+    'operations strategy manager': 'Operations Strategy Manager',
+    'operational analytics manager': 'Operational Analytics Manager',
+    'solution architect': 'Solution Architect',
+    'solutions architect': 'Solution Architect',
+    'solution consultant': 'Solution Consultant',
+    'solutions consultant': 'Solution Consultant',
+    'data engineer': 'Data Engineer',
+    'devops engineer': 'DevOps Engineer',
+    'engineering manager': 'Engineering Manager',
+    'business analyst': 'Business Analyst',
+    'data analyst': 'Data Analyst',
+    'quality assurance': 'Quality Assurance Engineer',
+    'qa engineer': 'Quality Assurance Engineer',
+    'research scientist': 'Research Scientist'
+}
+
+# Single alternation over every known role (whole words only, longest first),
+# so one regex scan finds every role mentioned in a title
+KNOWN_ROLE_RE = re.compile(r'\b(?:' + '|'.join(
+    re.escape(key) for key in sorted(KNOWN_ROLES, key=len, reverse=True)
+) + r')\b')
+
+# Fuzzy fallback for titles that contain no known role verbatim. Scored on the whole title, so
+# a shared word such as 'manager' or 'engineer' can't carry a different role over the cutoff
+KNOWN_ROLE_KEYS = list(KNOWN_ROLES)
+KNOWN_ROLE_FUZZY_CUTOFF = 90
+KNOWN_ROLE_FUZZY_MIN_LENGTH = 3
+
+@lru_cache(maxsize=4096)
 def match_to_known_role(job_title):
     """Match job title to known role names for consistency."""
     if not job_title:
         return job_title
     
-    # Known role mappings (canonical names)
-    known_roles = {
-        'customer success manager': 'Customer Success Manager',
-        'csm': 'Customer Success Manager',
-        'account executive': 'Account Executive',
-        'ae': 'Account Executive',
-        'sales development representative': 'Sales Development Representative',
-        'sdr': 'Sales Development Representative',
-        'business development representative': 'Business Development Representative',
-        'bdr': 'Business Development Representative',
-        'sales representative': 'Sales Representative',
-        'sales rep': 'Sales Representative',
-        'software engineer': 'Software Engineer',
-        'developer': 'Software Engineer',
-        'product manager': 'Product Manager',
-        'pm': 'Product Manager',
-        'data scientist': 'Data Scientist',
-        'ml engineer': 'Data Scientist',
-        'machine learning engineer': 'Data Scientist',
-        'marketing manager': 'Marketing Manager',
-        'financial planning & analysis manager': 'Financial Planning & Analysis Manager',
-        'fp&a manager': 'Financial Planning & Analysis Manager',
-        'revenue operations manager': 'Revenue Operations Manager',
-        'revops manager': 'Revenue Operations Manager',
-        'gtm finance manager': 'GTM Finance Manager',
-        'go-to-market finance manager': 'GTM Finance Manager',
-        'strategic finance manager': 'Strategic Finance Manager',
-        'business finance manager': 'Business Finance Manager',
-        'financial operations manager': 'Financial Operations Manager',
-        'revenue strategy manager': 'Revenue Strategy Manager',
-        'business intelligence manager': 'Business Intelligence Manager',
-        'bi manager': 'Business Intelligence Manager',
-        'data analytics manager': 'Data Analytics Manager',
-        'analytics manager': 'Data Analytics Manager',
-        'corporate finance manager': 'Corporate Finance Manager',
-        'strategy manager': 'Strategy Manager',
-        'business strategy manager': 'Business Strategy Manager',
-        'strategic planning manager': 'Strategic Planning Manager',
-        'corporate strategy manager': 'Corporate Strategy Manager',
-        'business development manager': 'Business Development Manager',
-        'strategic initiatives manager': 'Strategic Initiatives Manager',
-        'business operations manager': 'Business Operations Manager',
-        'strategic partnerships manager': 'Strategic Partnerships Manager',
-        'operations manager': 'Operations Manager',
-        'process improvement manager': 'Process Improvement Manager',
-        'operational excellence manager': 'Operational Excellence Manager',
-        'business process manager': 'Business Process Manager',
-        'operations strategy manager': 'Operations Strategy Manager',
-        'operational analytics manager': 'Operational Analytics Manager',
-        'solution architect': 'Solution Architect',
-        'solutions architect': 'Solution Architect',
-        'solution consultant': 'Solution Consultant',
-        'solutions consultant': 'Solution Consultant',
-        'data engineer': 'Data Engineer',
-        'devops engineer': 'DevOps Engineer',
-        'engineering manager': 'Engineering Manager',
-        'business analyst': 'Business Analyst',
-        'data analyst': 'Data Analyst',
-        'quality assurance': 'Quality Assurance Engineer',
-        'qa engineer': 'Quality Assurance Engineer',
-        'research scientist': 'Research Scientist'
-    }
-    
     # Try exact match first
     title_lower = job_title.lower().strip()
-    if title_lower in known_roles:
-        return known_roles[title_lower]
+    if title_lower in KNOWN_ROLES:
+        return KNOWN_ROLES[title_lower]
     
-    # Try partial matches
-    for key, value in known_roles.items():
-        if key in title_lower or title_lower in key:
-            return value
+    # Try partial matches: the longest (most specific) known role inside the title...
+    role_matches = KNOWN_ROLE_RE.findall(title_lower)
+    if role_matches:
+        return KNOWN_ROLES[max(role_matches, key=len)]
+    
+    # ...or a close fuzzy match to a known role (very short titles only match exactly)
+    if len(title_lower) >= KNOWN_ROLE_FUZZY_MIN_LENGTH:
+        fuzzy_match = process.extractOne(
+            title_lower, KNOWN_ROLE_KEYS, scorer=fuzz.token_sort_ratio, score_cutoff=KNOWN_ROLE_FUZZY_CUTOFF
+        )
+        if fuzzy_match:
+            return KNOWN_ROLES[fuzzy_match[0]]
     
     # If no match found, return the cleaned title as-is
     return job_title
@@ -1479,167 +1745,112 @@ def contacts_info():
     """Get information about currently loaded contacts - SECURE VERSION."""
     try:
         # Get current user's organization
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify({'error': 'Not authenticated'}), 401
-        
-        current_user = User.query.get(user_id)
-        if not current_user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        # Get organisation stats
-        stats = get_organisation_stats(current_user.organisation_id)
-        
-        # Get sample contacts (limited to 5 for security)
-        contacts = get_organisation_contacts_for_job(current_user.organisation_id)
-        sample_contacts = []
+        current_user = g.current_user
         
-        for contact in contacts[:5]:  # Limit to 5 for security
-            sample_contacts.append({
-                'First Name': contact.first_name,
-                'Last Name': contact.last_name,
-                'Company': contact.company or '',
-                'Position': contact.position or ''
+        cached = _contacts_info_cache.get(current_user.organisation_id)
+        if cached is None:
+            # Get organisation stats
+            stats = get_organisation_stats(current_user.organisation_id)
+            
+            # Get sample contacts (limited to 5 for security)
+            sample_contacts = [
+                {
+                    'First Name': first_name,
+                    'Last Name': last_name,
+                    'Company': company or '',
+                    'Position': position or ''
+                }
+                for first_name, last_name, company, position in get_organisation_contact_sample(current_user.organisation_id, limit=5)
+            ]
+            
+            body = app.json.dumps({
+                'total_contacts': stats['total_contacts'],
+                'source': f"Database: {current_user.organisation.name}",
+                'sample_contacts': sample_contacts,
+                'organisation_stats': stats
             })
-        
-        return jsonify({
-            'total_contacts': stats['total_contacts'],
-            'source': f"Database: {current_user.organisation.name}",
-            'sample_contacts': sample_contacts,
-            'organisation_stats': stats
-        })
+            cached = (body, hashlib.blake2b(body.encode(), digest_size=16).hexdigest())
+            _contacts_info_cache.set(current_user.organisation_id, cached)
+        
+        # Unchanged payloads are answered with 304 Not Modified
+        body, etag = cached
+        response = precomputed_json_response(body)
+        response.set_etag(etag)
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # SECURITY: Removed /api/contacts endpoint to prevent directory access
 # Users can only access contacts through job-specific matching
 
+# Placeholder API bodies are constant, so serialize them once at import
+# (responses are still built per request since after_request mutates headers)
+EMPTY_JOB_DESCRIPTIONS_BODY = json.dumps({'success': True, 'job_descriptions': []})
+JOB_DESCRIPTION_CREATED_BODY = json.dumps({'success': True, 'message': 'Job description created successfully'})
+JOB_DESCRIPTION_NOT_FOUND_BODY = json.dumps({'success': False, 'error': 'Job description not found'})
+JOB_DESCRIPTION_DELETED_BODY = json.dumps({'success': True, 'message': 'Job description deleted successfully'})
+EMPTY_JOB_DESCRIPTION_STATS_BODY = json.dumps({
+    'success': True,
+    'stats': {
+        'total_jobs': 0,
+        'active_jobs': 0,
+        'total_referrals': 0,
+        'avg_candidates': 0
+    }
+})
+EMPTY_REFERRALS_BODY = json.dumps({
+    'success': True,
+    'referrals': [],
+    'stats': {
+        'total_jobs': 0,
+        'total_candidates': 0,
+        'exact_matches': 0,
+        'other_matches': 0
+    }
+})
+
+def precomputed_json_response(body, status=200):
+    """Wrap a pre-serialized JSON body in a response."""
+    return app.response_class(body, status=status, mimetype='application/json')
+
 # Job Descriptions API endpoints
+# Placeholders until job descriptions are stored in the database
 @app.route('/api/job-descriptions', methods=['GET'])
 @require_auth
 def get_job_descriptions():
     """Get all job descriptions."""
-    try:
-        # For now, return empty list - you'll need to implement a database
-        # This is a placeholder for the job descriptions storage
-        job_descriptions = []
-        
-        return jsonify({
-            'success': True,
-            'job_descriptions': job_descriptions
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return precomputed_json_response(EMPTY_JOB_DESCRIPTIONS_BODY)
 
 @app.route('/api/job-descriptions', methods=['POST'])
 @require_auth
 def create_job_description():
     """Create a new job description."""
-    try:
-        data = request.get_json()
-        
-        # For now, just return success - you'll need to implement database storage
-        # This is a placeholder for the job description creation
-        
-        return jsonify({
-            'success': True,
-            'message': 'Job description created successfully'
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return precomputed_json_response(JOB_DESCRIPTION_CREATED_BODY)
 
 @app.route('/api/job-descriptions/<int:job_id>', methods=['GET'])
 @require_auth
 def get_job_description(job_id):
     """Get a specific job description."""
-    try:
-        # For now, return a placeholder - you'll need to implement database lookup
-        # This is a placeholder for the job description retrieval
-        
-        return jsonify({
-            'success': False,
-            'error': 'Job description not found'
-        }), 404
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return precomputed_json_response(JOB_DESCRIPTION_NOT_FOUND_BODY, status=404)
 
 @app.route('/api/job-descriptions/<int:job_id>', methods=['DELETE'])
 @require_auth
 def delete_job_description(job_id):
     """Delete a job description."""
-    try:
-        # For now, just return success - you'll need to implement database deletion
-        # This is a placeholder for the job description deletion
-        
-        return jsonify({
-            'success': True,
-            'message': 'Job description deleted successfully'
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return precomputed_json_response(JOB_DESCRIPTION_DELETED_BODY)
 
 @app.route('/api/job-descriptions/stats', methods=['GET'])
 @require_auth
 def get_job_descriptions_stats():
     """Get statistics for job descriptions."""
-    try:
-        # For now, return placeholder stats - you'll need to implement database queries
-        stats = {
-            'total_jobs': 0,
-            'active_jobs': 0,
-            'total_referrals': 0,
-            'avg_candidates': 0
-        }
-        
-        return jsonify({
-            'success': True,
-            'stats': stats
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return precomputed_json_response(EMPTY_JOB_DESCRIPTION_STATS_BODY)
 
 # Referrals API endpoints
 @app.route('/api/referrals', methods=['GET'])
 @require_auth
 def get_referrals():
     """Get all referrals for the current user."""
-    try:
-        # For now, return empty list - you'll need to implement database queries
-        # This is a placeholder for the referrals retrieval
-        
-        referrals = []
-        stats = {
-            'total_jobs': 0,
-            'total_candidates': 0,
-            'exact_matches': 0,
-            'other_matches': 0
-        }
-        
-        return jsonify({
-            'success': True,
-            'referrals': referrals,
-            'stats': stats
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    return precomputed_json_response(EMPTY_REFERRALS_BODY)
 
 # ===== MULTI-TENANT SYSTEM ROUTES =====
 
@@ -1702,17 +1913,19 @@ def register_company():
                 'error': 'Admin name must be at least 2 characters'
             }), 400
         
-        # Check if company already exists
-        existing_org = Organisation.query.filter_by(name=company_name).first()
-        if existing_org:
+        # Check company name and admin email uniqueness in one round trip
+        org_exists, admin_exists = db.session.query(
+            exists().where(Organisation.name == company_name),
+            exists().where(User.email == admin_email)
+        ).one()
+        
+        if org_exists:
             return jsonify({
                 'success': False,
                 'error': 'Company already exists'
             }), 400
         
-        # Check if admin email already exists
-        existing_admin = User.query.filter_by(email=admin_email).first()
-        if existing_admin:
+        if admin_exists:
             return jsonify({
                 'success': False,
                 'error': 'Admin email already registered'
@@ -1737,6 +1950,7 @@ def register_company():
             role='admin'
         )
         db.session.add(admin_user)
+        keep_loaded_after_commit()
         db.session.commit()
         
         secure_log(f"New company registered: {company_name} with admin {admin_name}")
@@ -1748,6 +1962,13 @@ def register_company():
             'admin_id': admin_user.id
         })
         
+    except IntegrityError:
+        # A concurrent registration claimed the name or email after the check above
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': 'Company or admin email already registered'
+        }), 400
     except Exception as e:
         db.session.rollback()
         secure_log(f"Company registration failed: {str(e)}", "ERROR")
@@ -1780,15 +2001,8 @@ def invite_employee():
             }), 400
         
         # Get current user's organisation
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'error': 'Not authenticated'
-            }), 401
-        
-        current_user = User.query.get(user_id)
-        if not current_user or current_user.role != 'admin':
+        current_user = g.current_user
+        if current_user.role != 'admin':
             return jsonify({
                 'success': False,
                 'error': 'Only admins can invite users'
@@ -1810,40 +2024,39 @@ def invite_employee():
             role=employee_role
         )
         db.session.add(new_user)
+        keep_loaded_after_commit()
         db.session.commit()
+        invalidate_organisation_stats(current_user.organisation_id)
+        _contacts_info_cache.pop(current_user.organisation_id)
         
-        # Send invitation email
-        email_result = None
+        # Queue invitation email
+        email_queued = False
         if email_service:
             try:
                 # Use organization-specific email settings if available
-                if current_user.organisation.from_email:
-                    email_service.from_email = current_user.organisation.from_email
-                if current_user.organisation.from_name:
-                    email_service.from_name = current_user.organisation.from_name
-                
-                email_result = email_service.send_team_invitation_email(
+                enqueue_email(
+                    email_service.send_team_invitation_email,
+                    f"team invitation to {employee_name} ({employee_email})",
+                    log=secure_log,
                     employee_name=employee_name,
                     employee_email=employee_email,
                     role=employee_role,
                     company_name=current_user.organisation.name,
-                    inviter_name=current_user.name
+                    inviter_name=current_user.name,
+                    from_email=current_user.organisation.from_email,
+                    from_name=current_user.organisation.from_name
                 )
-                
-                if email_result['success']:
-                    secure_log(f"📧 Invitation email sent to {employee_name} ({employee_email})")
-                else:
-                    secure_log(f"⚠️ Failed to send invitation email to {employee_name}: {email_result.get('error', 'Unknown error')}")
+                email_queued = True
             except Exception as email_error:
-                secure_log(f"⚠️ Error sending invitation email: {str(email_error)}")
+                secure_log(f"⚠️ Error queueing invitation email: {str(email_error)}")
         
         role_text = "admin" if employee_role == 'admin' else "employee"
         message = f'{role_text.title()} invited successfully'
         
         # Add email status to message
-        if email_result and email_result['success']:
-            message += ' and invitation email sent'
-        elif email_result and not email_result['success']:
+        if email_queued:
+            message += ' and invitation email queued'
+        elif email_service:
             message += ' (email invitation failed)'
         else:
             message += ' (email service unavailable)'
@@ -1853,7 +2066,7 @@ def invite_employee():
             'message': message,
             'user_id': new_user.id,
             'role': employee_role,
-            'email_sent': email_result['success'] if email_result else False
+            'email_queued': email_queued
         })
         
     except Exception as e:
@@ -1868,21 +2081,10 @@ def invite_employee():
 def get_company_dashboard():
     """Get company dashboard data."""
     try:
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'error': 'Not authenticated'
-            }), 401
+        # Loaded once per request (with organisation) by require_auth
+        current_user = g.current_user
         
-        current_user = User.query.get(user_id)
-        if not current_user:
-            return jsonify({
-                'success': False,
-                'error': 'User not found'
-            }), 404
-        
-        organisation = Organisation.query.get(current_user.organisation_id)
+        organisation = current_user.organisation
         if not organisation:
             return jsonify({
                 'success': False,
@@ -1892,17 +2094,15 @@ def get_company_dashboard():
         # Get company stats
         stats = get_organisation_stats(current_user.organisation_id)
         
-        # Get all employees in the company
-        employees = User.query.filter_by(organisation_id=current_user.organisation_id).all()
-        employee_data = []
-        for emp in employees:
-            employee_data.append({
-                'id': emp.id,
-                'name': emp.name,
-                'email': emp.email,
-                'role': emp.role,
-                'created_at': emp.created_at.isoformat() if emp.created_at else None
-            })
+        # Get all employees in the company as plain rows, streamed in batches
+        employee_rows = db.session.query(
+            User.id, User.name, User.email, User.role, User.created_at
+        ).filter(User.organisation_id == organisation.id).yield_per(200)
+        employee_data = [
+            {'id': emp_id, 'name': name, 'email': email, 'role': role,
+             'created_at': created_at.isoformat() if created_at else None}
+            for emp_id, name, email, role, created_at in employee_rows
+        ]
         
         return jsonify({
             'success': True,
@@ -1936,41 +2136,27 @@ def dashboard():
     user_role = request.session_data['user_role']
     organisation_id = request.session_data['organisation_id']
     
-    print(f"✅ DEBUG: Dashboard - User ID: {user_id}, Role: {user_role}, Org ID: {organisation_id}")
-    
-    user = User.query.get(user_id)
-    if not user:
-        print(f"❌ DEBUG: Dashboard - No user found, redirecting to login")
-        return redirect(url_for('login'))
+    app.logger.debug("✅ DEBUG: Dashboard - User ID: %s, Role: %s, Org ID: %s", user_id, user_role, organisation_id)
     
-    print(f"✅ DEBUG: Dashboard - User found: {user.name} ({user.email})")
+    # require_auth already loaded the user together with their organisation
+    user = g.current_user
+    app.logger.debug("✅ DEBUG: Dashboard - User found: %s (%s)", user.name, user.email)
     
     # Get organisation data
     organisation = user.organisation
-    print(f"✅ DEBUG: Dashboard - Organisation: {organisation.name if organisation else 'None'}")
-    
-    # Get team members
-    team_members = User.query.filter_by(organisation_id=user.organisation_id).all()
-    print(f"✅ DEBUG: Dashboard - Team members count: {len(team_members)}")
+    app.logger.debug("✅ DEBUG: Dashboard - Organisation: %s", organisation.name if organisation else None)
     
-    # Get contact count
-    contact_count = db.session.query(Contact).join(EmployeeContact).filter(
-        EmployeeContact.organisation_id == user.organisation_id
-    ).count()
-    print(f"✅ DEBUG: Dashboard - Contact count: {contact_count}")
+    # Get team members (only the columns the page shows)
+    team_members = db.session.query(User.id, User.name, User.email, User.role).filter(
+        User.organisation_id == user.organisation_id
+    ).all()
+    app.logger.debug("✅ DEBUG: Dashboard - Team members count: %d", len(team_members))
     
-    # Get job descriptions count
-    job_count = JobDescription.query.filter_by(organisation_id=user.organisation_id).count()
-    print(f"✅ DEBUG: Dashboard - Job count: {job_count}")
-    
-    print(f"✅ DEBUG: Dashboard - Rendering template")
     csrf_token = generate_csrf()
     return render_template('dashboard.html', 
                          user=user, 
                          organisation=organisation,
                          team_members=team_members,
-                         contact_count=contact_count,
-                         job_count=job_count,
                          user_role=user_role,
                          csrf_token=csrf_token)
 
@@ -1984,111 +2170,16 @@ def referrals_page():
 @app.route('/api/init-database', methods=['POST', 'GET'])
 @csrf.exempt
 def init_database_endpoint():
-    """Manually initialize database with demo organization and run migrations."""
+    """Manually initialize database with demo organization."""
     try:
-        # First, run database migration to add missing columns
-        from sqlalchemy import text
-        
-        print("🔧 Running database migration...")
-        
-        # Check if from_email column exists and add it if missing
-        result = db.session.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'organisations' 
-            AND column_name = 'from_email'
-        """))
-        
-        if not result.fetchone():
-            print("➕ Adding from_email column to organisations table...")
-            db.session.execute(text("ALTER TABLE organisations ADD COLUMN from_email VARCHAR(255)"))
-            db.session.commit()
-            print("✅ Added from_email column")
-        else:
-            print("✅ from_email column already exists")
-        
-        # Check if from_name column exists and add it if missing
-        result = db.session.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'organisations' 
-            AND column_name = 'from_name'
-        """))
-        
-        if not result.fetchone():
-            print("➕ Adding from_name column to organisations table...")
-            db.session.execute(text("ALTER TABLE organisations ADD COLUMN from_name VARCHAR(255)"))
-            db.session.commit()
-            print("✅ Added from_name column")
-        else:
-            print("✅ from_name column already exists")
-        
-        # Check if user_sessions table exists and create it if missing
-        result = db.session.execute(text("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_name = 'user_sessions'
-        """))
-        
-        if not result.fetchone():
-            print("➕ Creating user_sessions table...")
-            db.session.execute(text("""
-                CREATE TABLE user_sessions (
-                    id VARCHAR(36) PRIMARY KEY,
-                    session_id VARCHAR(36) UNIQUE NOT NULL,
-                    user_id VARCHAR(36) REFERENCES users(id),
-                    user_role VARCHAR(20) NOT NULL,
-                    organisation_id VARCHAR(36) REFERENCES organisations(id),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    expires_at TIMESTAMP NOT NULL,
-                    last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """))
-            db.session.execute(text("CREATE INDEX idx_user_sessions_session_id ON user_sessions(session_id)"))
-            db.session.commit()
-            print("✅ Created user_sessions table")
-        else:
-            print("✅ user_sessions table already exists")
-            
-            # Check if user_role column exists and add it if missing
-            result = db.session.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'user_sessions' AND column_name = 'user_role'
-            """))
-            
-            if not result.fetchone():
-                print("➕ Adding user_role column to user_sessions...")
-                db.session.execute(text("ALTER TABLE user_sessions ADD COLUMN user_role VARCHAR(20)"))
-                db.session.commit()
-                print("✅ Added user_role column")
-            else:
-                print("✅ user_role column already exists")
-            
-            # Check if organisation_id column exists and add it if missing
-            result = db.session.execute(text("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'user_sessions' AND column_name = 'organisation_id'
-            """))
-            
-            if not result.fetchone():
-                print("➕ Adding organisation_id column to user_sessions...")
-                db.session.execute(text("ALTER TABLE user_sessions ADD COLUMN organisation_id VARCHAR(36) REFERENCES organisations(id)"))
-                db.session.commit()
-                print("✅ Added organisation_id column")
-            else:
-                print("✅ organisation_id column already exists")
-        
-        print("✅ Database migration completed successfully")
-        
-        # Now check if demo organization already exists (after migration)
+        # Schema changes (e.g. the organisation sender columns) are applied by
+        # 'alembic upgrade head' at release time, and tables by create_all at startup
         demo_org = Organisation.query.filter_by(name="Demo Company").first()
         
         if demo_org:
             return jsonify({
                 'success': True,
-                'message': 'Demo organization already exists. Database migration completed.',
+                'message': 'Demo organization already exists.',
                 'organisation_id': str(demo_org.id)
             })
         
@@ -2106,6 +2197,7 @@ def init_database_endpoint():
         })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'error': str(e)
@@ -2119,19 +2211,18 @@ def create_demo_users_endpoint():
         from models import EmployeeContact
         
         # Find the organization with the most contacts
-        org_contact_counts = db.session.query(
+        contact_count_column = db.func.count(EmployeeContact.id).label('contact_count')
+        max_contacts = db.session.query(
             EmployeeContact.organisation_id,
-            db.func.count(EmployeeContact.id).label('contact_count')
-        ).group_by(EmployeeContact.organisation_id).all()
+            contact_count_column
+        ).group_by(EmployeeContact.organisation_id).order_by(contact_count_column.desc()).first()
         
-        if not org_contact_counts:
+        if not max_contacts:
             return jsonify({
                 'success': False,
                 'error': 'No organizations with contacts found'
             }), 404
         
-        # Find organization with most contacts
-        max_contacts = max(org_contact_counts, key=lambda x: x.contact_count)
         target_org_id = max_contacts.organisation_id
         contact_count = max_contacts.contact_count
         
@@ -2144,15 +2235,14 @@ def create_demo_users_endpoint():
             }), 404
         
         # Check if demo users already exist
-        existing_admin = User.query.filter_by(
-            organisation_id=target_org_id,
-            email="admin@demo.com"
-        ).first()
-        
-        existing_employee = User.query.filter_by(
-            organisation_id=target_org_id,
-            email="employee@demo.com"
-        ).first()
+        existing_users = {
+            user.email: user for user in User.query.filter(
+                User.organisation_id == target_org_id,
+                User.email.in_(["admin@demo.com", "employee@demo.com"])
+            ).all()
+        }
+        existing_admin = existing_users.get("admin@demo.com")
+        existing_employee = existing_users.get("employee@demo.com")
         
         created_users = []
         
@@ -2219,48 +2309,19 @@ def request_referral():
                 'error': 'Contact ID is required'
             }), 400
         
-        # Get current user
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'error': 'Not authenticated'
-            }), 401
+        # Current user was resolved by require_auth
+        current_user = g.current_user
         
-        current_user = User.query.get(user_id)
-        if not current_user:
-            return jsonify({
-                'success': False,
-                'error': 'User not found'
-            }), 404
+        # Resolve the contact and the employee in this organisation who knows them in one query
+        match = get_referral_match(contact_id, current_user.organisation_id)
         
-        # Get the contact
-        contact = Contact.query.get(contact_id)
-        if not contact:
-            return jsonify({
-                'success': False,
-                'error': 'Contact not found'
-            }), 404
-        
-        # Find which employee in the organization knows this contact
-        employee_contact = EmployeeContact.query.filter_by(
-            contact_id=contact_id,
-            organisation_id=current_user.organisation_id
-        ).first()
-        
-        if not employee_contact:
+        if not match:
             return jsonify({
                 'success': False,
                 'error': 'No employee in your organization knows this contact'
             }), 404
         
-        # Get the employee who knows this contact
-        employee = User.query.get(employee_contact.employee_id)
-        if not employee:
-            return jsonify({
-                'success': False,
-                'error': 'Employee not found'
-            }), 404
+        contact, employee = match
         
         # Create referral request
         referral = Referral(
@@ -2274,17 +2335,13 @@ def request_referral():
             status='pending'
         )
         db.session.add(referral)
+        keep_loaded_after_commit()
         db.session.commit()
+        invalidate_my_referrals(current_user.id, employee.id)
         
         # Send email notification to employee via SendGrid
         if email_service:
             try:
-                # Update email service with organization's email settings
-                if current_user.organisation.from_email:
-                    email_service.from_email = current_user.organisation.from_email
-                if current_user.organisation.from_name:
-                    email_service.from_name = current_user.organisation.from_name
-                
                 # Create contact data for email
                 contact_data = [{
                     'name': f"{contact.first_name} {contact.last_name}",
@@ -2294,18 +2351,19 @@ def request_referral():
                     'linkedin_url': contact.linkedin_url or 'N/A'
                 }]
                 
-                # Send individual referral email
-                email_result = email_service.send_referral_email(
+                # Send individual referral email in the background
+                enqueue_email(
+                    email_service.send_referral_email,
+                    f"referral request to {employee.name} ({employee.email}) for {contact.first_name} {contact.last_name}",
+                    log=secure_log,
                     employee_name=employee.name,
                     contacts=contact_data,
                     job_title=job_title,
-                    job_location=data.get('jobLocation', 'N/A')
+                    job_location=data.get('jobLocation', 'N/A'),
+                    # Send from the organization's own address when configured
+                    from_email=current_user.organisation.from_email,
+                    from_name=current_user.organisation.from_name
                 )
-                
-                if email_result['success']:
-                    secure_log(f"📧 Referral email sent to {employee.name} ({employee.email}) for {contact.first_name} {contact.last_name}")
-                else:
-                    secure_log(f"⚠️ Failed to send email to {employee.name}: {email_result.get('error', 'Unknown error')}")
                     
             except Exception as email_error:
                 secure_log(f"⚠️ Email service error: {str(email_error)}")
@@ -2343,94 +2401,101 @@ def send_bulk_referral_emails():
                 'error': 'No contacts selected'
             }), 400
         
-        # Get current user
-        user_id = session.get('user_id')
-        if not user_id:
+        if not all(isinstance(c, dict) and c.get('contactId') for c in selected_contacts):
             return jsonify({
                 'success': False,
-                'error': 'Not authenticated'
-            }), 401
-        
-        current_user = User.query.get(user_id)
-        if not current_user:
-            return jsonify({
-                'success': False,
-                'error': 'User not found'
-            }), 404
+                'error': 'Every selected contact needs a contactId'
+            }), 400
         
-        # Group contacts by employee
-        contacts_by_employee = {}
-        successful_emails = 0
-        total_emails = 0
+        # De-duplicate while keeping selection order, so a contact is only referred once
+        contact_ids = list(dict.fromkeys(c['contactId'] for c in selected_contacts))
+        
+        # Get current user (loaded once per request, with organisation, by require_auth)
+        current_user = g.current_user
+        
+        # Resolve every selected contact and the employee who knows them in one query,
+        # selecting only the columns the referral rows and emails need
+        matches = db.session.query(
+            Contact.id, Contact.first_name, Contact.last_name, Contact.position,
+            Contact.company, Contact.location, Contact.linkedin_url,
+            User.id.label('employee_id'), User.name.label('employee_name')
+        ).join(
+            EmployeeContact, EmployeeContact.contact_id == Contact.id
+        ).join(
+            User, User.id == EmployeeContact.employee_id
+        ).filter(
+            Contact.id.in_(contact_ids),
+            EmployeeContact.organisation_id == current_user.organisation_id
+        ).all()
+        
+        # One employee per contact, as with a single referral request
+        match_by_contact = {}
+        for match in matches:
+            match_by_contact.setdefault(match.id, match)
+        
+        # Group contacts by employee and build the referral rows
+        contacts_by_employee = defaultdict(list)
+        referrals = []
         
-        for contact_data in selected_contacts:
-            contact_id = contact_data.get('contactId')
-            if not contact_id:
+        for contact_id in contact_ids:
+            match = match_by_contact.pop(contact_id, None)
+            if not match:
                 continue
-                
-            # Get the contact
-            contact = Contact.query.get(contact_id)
-            if not contact:
-                continue
-            
-            # Find which employee knows this contact
-            employee_contact = EmployeeContact.query.filter_by(
-                contact_id=contact_id,
-                organisation_id=current_user.organisation_id
-            ).first()
             
-            if not employee_contact:
-                continue
-            
-            # Get the employee
-            employee = User.query.get(employee_contact.employee_id)
-            if not employee:
-                continue
+            referrals.append({
+                'organisation_id': current_user.organisation_id,
+                'requester_id': current_user.id,
+                'employee_id': match.employee_id,
+                'contact_id': match.id,
+                'job_title': job_title,
+                'status': 'pending'
+            })
             
             # Add to employee's contact list
-            if employee.name not in contacts_by_employee:
-                contacts_by_employee[employee.name] = []
-            
-            contacts_by_employee[employee.name].append({
-                'name': f"{contact.first_name} {contact.last_name}",
-                'position': contact.position or 'N/A',
-                'company': contact.company or 'N/A',
-                'location': contact.location or 'N/A',
-                'linkedin_url': contact.linkedin_url or 'N/A'
+            contacts_by_employee[match.employee_name].append({
+                'name': f"{match.first_name} {match.last_name}",
+                'position': match.position or 'N/A',
+                'company': match.company or 'N/A',
+                'location': match.location or 'N/A',
+                'linkedin_url': match.linkedin_url or 'N/A'
             })
         
-        # Send emails to each employee
+        # Persist all referral requests with a batched multi-row INSERT
+        # (SQLAlchemy pages executemany into INSERT ... VALUES (...), (...) on PostgreSQL)
+        if referrals:
+            db.session.execute(insert(Referral), referrals)
+            keep_loaded_after_commit()
+            db.session.commit()
+            invalidate_my_referrals(current_user.id, *{row['employee_id'] for row in referrals})
+        
+        # Send emails to each employee in the background
         if email_service and contacts_by_employee:
-            # Update email service with organization's email settings
-            if current_user.organisation.from_email:
-                email_service.from_email = current_user.organisation.from_email
-            if current_user.organisation.from_name:
-                email_service.from_name = current_user.organisation.from_name
-                
-            email_results = email_service.send_bulk_referral_emails(
+            # Send from the organization's own address when configured
+            enqueue_email(
+                email_service.send_bulk_referral_emails,
+                f"bulk referral emails to {len(contacts_by_employee)} employees for {job_title}",
+                log=secure_log,
                 contacts_by_employee=contacts_by_employee,
                 job_title=job_title,
-                job_location=job_location
+                job_location=job_location,
+                from_email=current_user.organisation.from_email,
+                from_name=current_user.organisation.from_name
             )
-            
-            successful_emails = email_results.get('successful_emails', 0)
-            total_emails = email_results.get('total_emails', 0)
-            
-            secure_log(f"📧 Bulk referral emails sent: {successful_emails}/{total_emails} successful")
+            secure_log(f"📧 Bulk referral emails queued: {len(contacts_by_employee)} employees")
         else:
             secure_log(f"📧 Bulk referral emails logged (email service not available): {len(contacts_by_employee)} employees")
-            successful_emails = len(contacts_by_employee)
-            total_emails = len(contacts_by_employee)
         
         return jsonify({
             'success': True,
-            'message': f'Bulk referral emails sent to {len(contacts_by_employee)} employees',
-            'successful_emails': successful_emails,
-            'total_emails': total_emails,
+            'queued': True,
+            'message': f'Bulk referral emails queued for {len(contacts_by_employee)} employees',
+            'employees': len(contacts_by_employee),
+            'total_emails': len(contacts_by_employee),
             'employees_contacted': list(contacts_by_employee.keys())
         })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'error': str(e)
@@ -2441,48 +2506,73 @@ def send_bulk_referral_emails():
 def get_my_referrals():
     """Get all referrals for the current user."""
     try:
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'error': 'Not authenticated'
-            }), 401
+        # Loaded once per request (with organisation) by require_auth
+        current_user = g.current_user
         
-        current_user = User.query.get(user_id)
-        if not current_user:
+        # Serve this user's recent list from cache; referral writes evict it
+        user_id = current_user.id
+        referral_data = _my_referrals_cache.get(user_id)
+        if referral_data is not None:
             return jsonify({
-                'success': False,
-                'error': 'User not found'
-            }), 404
-        
-        # Get referrals where user is either requester or employee
-        referrals = Referral.query.filter(
-            (Referral.requester_id == current_user.id) | 
-            (Referral.employee_id == current_user.id)
-        ).filter_by(organisation_id=current_user.organisation_id).all()
-        
-        referral_data = []
-        for referral in referrals:
-            # Get contact details
-            contact = Contact.query.get(referral.contact_id)
-            requester = User.query.get(referral.requester_id)
-            employee = User.query.get(referral.employee_id)
-            
-            referral_data.append({
-                'id': referral.id,
-                'contact_name': f"{contact.first_name} {contact.last_name}" if contact else "Unknown",
-                'contact_company': contact.company if contact else "",
-                'contact_position': contact.position if contact else "",
-                'job_title': referral.job_title,
-                'requester_name': requester.name if requester else "Unknown",
-                'employee_name': employee.name if employee else "Unknown",
-                'status': referral.status,
-                'requester_message': referral.requester_message,
-                'created_at': referral.created_at.isoformat() if referral.created_at else None,
-                'is_my_request': referral.requester_id == current_user.id,
-                'is_my_referral': referral.employee_id == current_user.id
+                'success': True,
+                'referrals': referral_data
             })
         
+        # Get referrals where user is either requester or employee. The two sides are
+        # separate index lookups (requester/org and employee/org) combined with UNION ALL;
+        # the second excludes self-referrals so no row is returned twice
+        organisation_id = current_user.organisation_id
+        my_referral_ids = select(Referral.id).where(
+            Referral.requester_id == user_id,
+            Referral.organisation_id == organisation_id
+        ).union_all(
+            select(Referral.id).where(
+                Referral.employee_id == user_id,
+                Referral.requester_id.is_distinct_from(user_id),
+                Referral.organisation_id == organisation_id
+            )
+        ).subquery()
+        
+        # Select just the columns the list shows (contact, requester and employee joined in)
+        Requester = aliased(User)
+        Employee = aliased(User)
+        # Pure read: skip the autoflush check before the query executes
+        with db.session.no_autoflush:
+            rows = db.session.query(
+                Referral.id, Referral.job_title, Referral.status, Referral.requester_message,
+                Referral.created_at, Referral.requester_id, Referral.employee_id,
+                Contact.first_name, Contact.last_name, Contact.company, Contact.position,
+                Requester.name, Employee.name
+            ).join(
+                my_referral_ids, my_referral_ids.c.id == Referral.id
+            ).outerjoin(
+                Contact, Contact.id == Referral.contact_id
+            ).outerjoin(
+                Requester, Requester.id == Referral.requester_id
+            ).outerjoin(
+                Employee, Employee.id == Referral.employee_id
+            ).all()
+        
+        referral_data = [
+            {
+                'id': referral_id,
+                'contact_name': f"{first_name} {last_name}" if first_name is not None else "Unknown",
+                'contact_company': company if first_name is not None else "",
+                'contact_position': position if first_name is not None else "",
+                'job_title': job_title,
+                'requester_name': requester_name or "Unknown",
+                'employee_name': employee_name or "Unknown",
+                'status': status,
+                'requester_message': requester_message,
+                'created_at': created_at.isoformat() if created_at else None,
+                'is_my_request': requester_id == user_id,
+                'is_my_referral': employee_id == user_id
+            }
+            for (referral_id, job_title, status, requester_message, created_at, requester_id, employee_id,
+                 first_name, last_name, company, position, requester_name, employee_name) in rows
+        ]
+        _my_referrals_cache.set(user_id, referral_data)
+        
         return jsonify({
             'success': True,
             'referrals': referral_data
@@ -2510,48 +2600,43 @@ def update_referral_status():
                 'error': 'Referral ID and status are required'
             }), 400
         
-        # Get current user
-        user_id = session.get('user_id')
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'error': 'Not authenticated'
-            }), 401
+        # Get current user (loaded once per request, with organisation, by require_auth)
+        current_user = g.current_user
         
-        current_user = User.query.get(user_id)
-        if not current_user:
-            return jsonify({
-                'success': False,
-                'error': 'User not found'
-            }), 404
-        
-        # Get the referral
-        referral = Referral.query.get(referral_id)
-        if not referral:
-            return jsonify({
-                'success': False,
-                'error': 'Referral not found'
-            }), 404
+        # Update referral status in one statement; the WHERE clause enforces that
+        # only the employee assigned to the referral can respond
+        values = {'status': new_status, 'updated_at': datetime.now(timezone.utc)}
+        if employee_message:
+            values['employee_message'] = employee_message
+        updated = db.session.execute(
+            update(Referral).where(
+                Referral.id == referral_id,
+                Referral.employee_id == current_user.id
+            ).values(**values).returning(Referral.requester_id)
+        ).first()
         
-        # Check if user is the employee for this referral
-        if referral.employee_id != current_user.id:
+        if not updated:
+            db.session.rollback()
+            referral_exists = db.session.query(exists().where(Referral.id == referral_id)).scalar()
+            if not referral_exists:
+                return jsonify({
+                    'success': False,
+                    'error': 'Referral not found'
+                }), 404
+            
             return jsonify({
                 'success': False,
                 'error': 'You can only update referrals assigned to you'
             }), 403
         
-        # Update referral status
-        referral.status = new_status
-        if employee_message:
-            referral.employee_message = employee_message
-        referral.updated_at = datetime.now(timezone.utc)
-        
+        keep_loaded_after_commit()
         db.session.commit()
+        invalidate_my_referrals(current_user.id, updated.requester_id)
         
         # Log the update
-        print(f"📝 Referral {referral_id} status updated to {new_status} by {current_user.name}")
+        app.logger.info("📝 Referral %s status updated to %s by %s", referral_id, new_status, current_user.name)
         if employee_message:
-            print(f"   Message: {employee_message}")
+            app.logger.info("   Message: %s", employee_message)
         
         return jsonify({
             'success': True,
@@ -2569,8 +2654,11 @@ def update_referral_status():
 @require_auth
 def logout():
     """User logout."""
+    end_database_session(request.cookies.get('auth_session'))
     session.clear()
-    return redirect(url_for('login'))
+    response = redirect(url_for('login'))
+    response.delete_cookie('auth_session')
+    return response
 
 if __name__ == '__main__':
     print("🚀 Starting Referral Matching Web App...")
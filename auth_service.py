@@ -6,9 +6,12 @@ Production-ready authentication service with comprehensive security features.
 import secrets
 import hashlib
 from datetime import datetime, timedelta
-from flask import request, session, current_app
+from flask import request, session, current_app, jsonify
 from functools import wraps
-from models import db, User, UserSession, AuditLog, Organisation
+from models import db, User, UserSession, AuditLog, Organisation, RateLimit
+
+# A session's expiry is pushed out (one UPDATE) at most once per this much activity
+SESSION_EXTEND_INTERVAL = timedelta(minutes=30)
 
 class AuthService:
     """Production-ready authentication service."""
@@ -150,7 +153,7 @@ class AuthService:
                 # For now, allow IP changes but log them
             
             # Extend session if needed
-            if user_session.last_activity < datetime.utcnow() - timedelta(minutes=30):
+            if user_session.last_activity < datetime.utcnow() - SESSION_EXTEND_INTERVAL:
                 user_session.extend_session()
             
             return user, user_session, None
@@ -162,15 +165,14 @@ class AuthService:
     def logout_user(session_token, ip_address=None, user_agent=None):
         """Logout user and deactivate session."""
         try:
-            user_session = UserSession.get_active_session(session_token)
-            if user_session:
-                user = User.query.get(user_session.user_id)
-                
+            # Deactivate session (the UPDATE returns the ids the audit event needs)
+            ended = UserSession.deactivate_by_token(session_token)
+            if ended:
                 # Log logout
                 AuditLog.log_event(
-                    user_id=user.id if user else None,
-                    organisation_id=user.organisation_id if user else None,
-                    session_id=user_session.id,
+                    user_id=ended.user_id,
+                    organisation_id=ended.organisation_id,
+                    session_id=ended.id,
                     event_type='logout',
                     event_category='auth',
                     description=f'User logout',
@@ -179,9 +181,6 @@ class AuthService:
                     user_agent=user_agent
                 )
                 
-                # Deactivate session
-                user_session.deactivate()
-                
                 return True, None
             else:
                 return False, "Session not found"
@@ -194,6 +193,8 @@ class AuthService:
         """Clean up expired sessions."""
         try:
             count = UserSession.cleanup_expired_sessions()
+            # Stale login rate-limit rows are swept here rather than on every login attempt
+            RateLimit.cleanup_expired()
             return count, None
         except Exception as e:
             return 0, str(e)
@@ -273,28 +274,30 @@ def require_org_access(f):
     """Decorator to ensure user can only access their organization's data."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not hasattr(request, 'current_user'):
-            return redirect_to_login()
+        # Most routes have no organisation in the URL, so there is nothing to check
+        organisation_id = kwargs.get('organisation_id')
+        if organisation_id is None:
+            return f(*args, **kwargs)
         
-        user = request.current_user
-        user_session = request.current_session
+        user = getattr(request, 'current_user', None)
+        if user is None:
+            return redirect_to_login()
         
         # Check organization access
-        if 'organisation_id' in kwargs:
-            if user.organisation_id != kwargs['organisation_id']:
-                AuditLog.log_event(
-                    user_id=user.id,
-                    organisation_id=user.organisation_id,
-                    session_id=user_session.id,
-                    event_type='unauthorized_org_access',
-                    event_category='security',
-                    description=f'Unauthorized organization access attempt',
-                    success=False,
-                    ip_address=request.remote_addr,
-                    user_agent=request.headers.get('User-Agent'),
-                    error_message=f'Attempted access to org: {kwargs["organisation_id"]}'
-                )
-                return jsonify({'error': 'Access denied'}), 403
+        if user.organisation_id != organisation_id:
+            AuditLog.log_event(
+                user_id=user.id,
+                organisation_id=user.organisation_id,
+                session_id=request.current_session.id,
+                event_type='unauthorized_org_access',
+                event_category='security',
+                description=f'Unauthorized organization access attempt',
+                success=False,
+                ip_address=request.remote_addr,
+                user_agent=request.headers.get('User-Agent'),
+                error_message=f'Attempted access to org: {organisation_id}'
+            )
+            return jsonify({'error': 'Access denied'}), 403
         
         return f(*args, **kwargs)
     return decorated_function
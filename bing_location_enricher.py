@@ -5,22 +5,97 @@ Implements geo-searching at scale using Bing Web Search API (Azure Cognitive Ser
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import os
 import re
+import sqlite3
+import threading
 import time
 import hashlib
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional, Tuple
 from unidecode import unidecode
 import pandas as pd
 
+# Contacts looked up at once during bulk enrichment
+BING_MAX_CONCURRENT_REQUESTS = 3
+# Bing Web Search requests allowed per second across all threads
+BING_MAX_QPS = 3
+# (connect, read) timeout in seconds for Bing requests
+BING_REQUEST_TIMEOUT = (3, 10)
+# SQLite file that keeps Bing responses and located contacts between runs
+BING_CACHE_PATH = os.environ.get('BING_CACHE_PATH', '.bing_cache.sqlite3')
+# How long cached Bing responses and locations stay fresh (7 days)
+BING_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# Location extraction patterns (from user's recommendation), compiled once for every snippet
+LOCATION_PATTERNS = [
+    re.compile(r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s*[·—\-•|]\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)"),
+    re.compile(r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*([A-Z]{2})"),  # City, State
+    re.compile(r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*([A-Z][a-z]+)"),  # City, Country
+]
+# Common snippet phrasings that carry a location
+COMMON_LOCATION_PATTERNS = [
+    re.compile(r"Title at Company · Location", re.IGNORECASE),
+    re.compile(r"Name · Company · Location", re.IGNORECASE),
+    re.compile(r"Based in ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", re.IGNORECASE),
+    re.compile(r"Located in ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)", re.IGNORECASE),
+]
+# Shapes of text that read as a place name
+LOCATION_LIKE_PATTERNS = [
+    re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:Area|Region|County|State|Country)\b'),
+    re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*,\s+[A-Z]{2}\b'),  # City, State
+    re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*,\s+[A-Z][a-z]+\b'),  # City, Country
+]
+def _gazetteer_re(locations) -> re.Pattern:
+    """Compile one case-folded substring alternation over gazetteer entries, longest first."""
+    return re.compile('|'.join(
+        re.escape(location.lower()) for location in sorted(locations, key=len, reverse=True)
+    ))
+
+# Location quality checks used by the confidence score
+CITY_STATE_RE = re.compile(r'[A-Z][a-z]+,\s*[A-Z]{2}')
+CITY_COUNTRY_RE = re.compile(r'[A-Z][a-z]+,\s*[A-Z][a-z]+')
+
+class BingResponseCache:
+    """Thread-safe SQLite key/value store for JSON values, so Bing quota isn't spent twice on the same lookup."""
+    
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS bing_cache (key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+    
+    def get(self, key: str, max_age: float):
+        """Return the value stored under key, or None if missing or older than max_age seconds."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM bing_cache WHERE key = ? AND stored_at >= ?",
+                (key, time.time() - max_age)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def set(self, key: str, value):
+        """Store a JSON-serializable value under key."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO bing_cache (key, stored_at, value) VALUES (?, ?, ?)",
+                (key, time.time(), json.dumps(value))
+            )
+            self._conn.commit()
+
 class BingLocationEnricher:
     """
     Enriches contact data with location information using Bing Web Search API.
     Designed for bulk processing during contact upload.
     """
     
-    def __init__(self, bing_api_key: str, endpoint: str = None):
-        """Initialize with Bing API key and endpoint."""
+    def __init__(self, bing_api_key: str, endpoint: str = None, cache_path: str = BING_CACHE_PATH):
+        """Initialize with Bing API key, endpoint and the path of the on-disk response cache."""
         self.api_key = bing_api_key
         
         # Use provided endpoint or construct from resource name
@@ -34,12 +109,14 @@ class BingLocationEnricher:
             'Ocp-Apim-Subscription-Key': self.api_key
         }
         
+        # One keep-alive session so lookups reuse TLS connections instead of reconnecting per query
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        retries = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+        self.session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retries))
+        
         # Location extraction patterns (from user's recommendation)
-        self.location_patterns = [
-            r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s*[·—\-•|]\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)",
-            r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*([A-Z]{2})",  # City, State
-            r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),\s*([A-Z][a-z]+)",  # City, Country
-        ]
+        self.location_patterns = LOCATION_PATTERNS
         
         # Common location separators
         self.separators = ['·', '—', '-', '•', '|']
@@ -51,9 +128,28 @@ class BingLocationEnricher:
             'countries': ['United Kingdom', 'United States', 'Canada', 'Australia', 'Germany', 'France']
         }
         
-        # Cache for deduplication
-        self.cache = {}
-        self.cache_ttl = 3600  # 1 hour TTL
+        # One scan per text instead of a substring check per gazetteer entry
+        self.gazetteer_re = _gazetteer_re(
+            location for locations in self.gazetteer.values() for location in locations
+        )
+        self.gazetteer_category_res = [_gazetteer_re(locations) for locations in self.gazetteer.values()]
+        
+        # Cache for deduplication, kept on disk so restarts don't re-query Bing
+        self.cache = BingResponseCache(cache_path)
+        self.cache_ttl = BING_CACHE_TTL_SECONDS
+        
+        # Spaces requests evenly so concurrent lookups stay under BING_MAX_QPS
+        self._rate_limit_lock = threading.Lock()
+        self._next_request_at = 0.0
+    
+    def _wait_for_rate_limit(self):
+        """Block until the next Bing request is allowed under BING_MAX_QPS."""
+        with self._rate_limit_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + 1.0 / BING_MAX_QPS
+        if wait > 0:
+            time.sleep(wait)
     
     def bing_search(self, query: str, mkt: str = "en-GB", count: int = 8) -> Optional[Dict]:
         """
@@ -67,6 +163,12 @@ class BingLocationEnricher:
         Returns:
             Bing API response or None
         """
+        # Different contacts can produce the same query, so raw responses are cached per query too
+        query_key = 'query:' + hashlib.md5(f"{mkt}|{count}|{query}".encode()).hexdigest()
+        cached_response = self.cache.get(query_key, self.cache_ttl)
+        if cached_response is not None:
+            return cached_response
+        
         try:
             params = {
                 'q': query,
@@ -75,10 +177,13 @@ class BingLocationEnricher:
                 'responseFilter': 'Webpages'
             }
             
-            response = requests.get(self.endpoint, headers=self.headers, params=params)
+            self._wait_for_rate_limit()
+            response = self.session.get(self.endpoint, params=params, timeout=BING_REQUEST_TIMEOUT)
             response.raise_for_status()
             
-            return response.json()
+            data = response.json()
+            self.cache.set(query_key, data)
+            return data
             
         except requests.exceptions.RequestException as e:
             print(f"⚠️ Bing API error for query '{query}': {str(e)}")
@@ -111,7 +216,7 @@ class BingLocationEnricher:
         
         # Method 2: Use regex patterns
         for pattern in self.location_patterns:
-            matches = re.findall(pattern, snippet)
+            matches = pattern.findall(snippet)
             for match in matches:
                 if isinstance(match, tuple):
                     # Handle multi-group patterns
@@ -126,15 +231,8 @@ class BingLocationEnricher:
                         return match.strip()
         
         # Method 3: Look for common patterns
-        common_patterns = [
-            r"Title at Company · Location",
-            r"Name · Company · Location",
-            r"Based in ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)",
-            r"Located in ([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)"
-        ]
-        
-        for pattern in common_patterns:
-            match = re.search(pattern, snippet, re.IGNORECASE)
+        for pattern in COMMON_LOCATION_PATTERNS:
+            match = pattern.search(snippet)
             if match:
                 location = match.group(1) if len(match.groups()) > 0 else match.group(0)
                 if self._is_location_like(location):
@@ -158,10 +256,8 @@ class BingLocationEnricher:
         text_lower = text.lower()
         
         # Check against gazetteer
-        for category, locations in self.gazetteer.items():
-            for location in locations:
-                if location.lower() in text_lower:
-                    return True
+        if self.gazetteer_re.search(text_lower):
+            return True
         
         # Check for location indicators
         indicators = ['area', 'region', 'county', 'state', 'country', 'city', 'greater']
@@ -170,14 +266,8 @@ class BingLocationEnricher:
                 return True
         
         # Check for common location patterns
-        location_patterns = [
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:Area|Region|County|State|Country)\b',
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*,\s+[A-Z]{2}\b',  # City, State
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*,\s+[A-Z][a-z]+\b',  # City, Country
-        ]
-        
-        for pattern in location_patterns:
-            if re.search(pattern, text):
+        for pattern in LOCATION_LIKE_PATTERNS:
+            if pattern.search(text):
                 return True
         
         return False
@@ -195,10 +285,9 @@ class BingLocationEnricher:
         """
         # Check cache first
         cache_key = self._get_cache_key(full_name, company)
-        if cache_key in self.cache:
-            cached_result = self.cache[cache_key]
-            if time.time() - cached_result['timestamp'] < self.cache_ttl:
-                return cached_result['data']
+        cached_result = self.cache.get(cache_key, self.cache_ttl)
+        if cached_result is not None:
+            return cached_result
         
         # Cascading search strategy
         queries = [
@@ -233,16 +322,10 @@ class BingLocationEnricher:
                             }
                             
                             # Cache the result
-                            self.cache[cache_key] = {
-                                'data': result,
-                                'timestamp': time.time()
-                            }
+                            self.cache.set(cache_key, result)
                             
                             return result
                 
-                # Rate limiting
-                time.sleep(0.5)
-                
             except Exception as e:
                 print(f"⚠️ Error processing query '{query}': {str(e)}")
                 continue
@@ -280,17 +363,16 @@ class BingLocationEnricher:
         # Location quality (40%)
         location_quality = 0.0
         
-        # Check if location is in gazetteer
-        for category, locations in self.gazetteer.items():
-            for loc in locations:
-                if loc.lower() in location.lower():
-                    location_quality += 0.2
-                    break
+        # Check if location is in gazetteer (each matching category counts once)
+        location_lower = location.lower()
+        for category_re in self.gazetteer_category_res:
+            if category_re.search(location_lower):
+                location_quality += 0.2
         
         # Check for location patterns
-        if re.search(r'[A-Z][a-z]+,\s*[A-Z]{2}', location):  # City, State
+        if CITY_STATE_RE.search(location):  # City, State
             location_quality += 0.3
-        elif re.search(r'[A-Z][a-z]+,\s*[A-Z][a-z]+', location):  # City, Country
+        elif CITY_COUNTRY_RE.search(location):  # City, Country
             location_quality += 0.2
         
         score += min(location_quality, 0.4)
@@ -323,10 +405,8 @@ class BingLocationEnricher:
         # Process contacts
         contacts_to_process = contacts_df.head(max_contacts) if max_contacts else contacts_df
         
+        lookups = []
         for idx, row in contacts_to_process.iterrows():
-            if idx % 10 == 0:
-                print(f"   Processing contact {idx + 1}/{len(contacts_to_process)}...")
-            
             first_name = str(row.get('First Name', '')).strip()
             last_name = str(row.get('Last Name', '')).strip()
             company = str(row.get('Company', '')).strip()
@@ -334,33 +414,40 @@ class BingLocationEnricher:
             if not first_name or not last_name or not company:
                 continue
             
-            full_name = f"{first_name} {last_name}"
-            
-            # Locate contact
-            location_data = self.locate_contact(full_name, company)
+            lookups.append((idx, f"{first_name} {last_name}", company))
+        
+        # Lookups are network-bound, so run several at once; bing_search keeps them under BING_MAX_QPS
+        with ThreadPoolExecutor(max_workers=BING_MAX_CONCURRENT_REQUESTS) as executor:
+            futures = {
+                executor.submit(self.locate_contact, full_name, company): idx
+                for idx, full_name, company in lookups
+            }
             
-            if location_data:
-                # Update DataFrame
-                contacts_df.at[idx, 'location_raw'] = location_data.get('location_raw')
-                contacts_df.at[idx, 'location_confidence'] = location_data.get('location_confidence')
-                contacts_df.at[idx, 'location_source'] = location_data.get('location_source')
-                contacts_df.at[idx, 'location_url'] = location_data.get('location_url')
-                contacts_df.at[idx, 'enriched_at'] = location_data.get('enriched_at')
+            for done, future in enumerate(as_completed(futures)):
+                if done % 10 == 0:
+                    print(f"   Processing contact {done + 1}/{len(lookups)}...")
                 
-                # Parse location components (simplified)
-                location_raw = location_data.get('location_raw', '')
-                if location_raw:
-                    parts = location_raw.split(',')
-                    if len(parts) >= 1:
-                        contacts_df.at[idx, 'location_city'] = parts[0].strip()
-                    if len(parts) >= 2:
-                        contacts_df.at[idx, 'location_region'] = parts[1].strip()
-                    if len(parts) >= 3:
-                        contacts_df.at[idx, 'location_country'] = parts[2].strip()
-            
-            # Rate limiting
-            if idx < len(contacts_to_process) - 1:
-                time.sleep(0.5)
+                idx = futures[future]
+                location_data = future.result()
+                
+                if location_data:
+                    # Update DataFrame
+                    contacts_df.at[idx, 'location_raw'] = location_data.get('location_raw')
+                    contacts_df.at[idx, 'location_confidence'] = location_data.get('location_confidence')
+                    contacts_df.at[idx, 'location_source'] = location_data.get('location_source')
+                    contacts_df.at[idx, 'location_url'] = location_data.get('location_url')
+                    contacts_df.at[idx, 'enriched_at'] = location_data.get('enriched_at')
+                    
+                    # Parse location components (simplified)
+                    location_raw = location_data.get('location_raw', '')
+                    if location_raw:
+                        parts = location_raw.split(',')
+                        if len(parts) >= 1:
+                            contacts_df.at[idx, 'location_city'] = parts[0].strip()
+                        if len(parts) >= 2:
+                            contacts_df.at[idx, 'location_region'] = parts[1].strip()
+                        if len(parts) >= 3:
+                            contacts_df.at[idx, 'location_country'] = parts[2].strip()
         
         print(f"✅ Bulk location enrichment complete!")
         return contacts_df
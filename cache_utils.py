@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Small in-process caching helpers shared by the web app.
+Each gunicorn worker keeps its own copy, so cached values must be safe to
+serve slightly stale for the length of their TTL.
+"""
+
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+class TTLCache:
+    """Thread-safe cache whose entries expire a fixed number of seconds after being set."""
+
+    def __init__(self, ttl_seconds, max_entries=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+
+            return value
+
+    def set(self, key, value):
+        """Cache value under key for ttl_seconds."""
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def pop(self, key):
+        """Invalidate a single key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Invalidate every key."""
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self):
+        """Drop expired entries, then the oldest entry if the cache is still full."""
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+
+        if len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+def read_csv_fast(path, **kwargs):
+    """pd.read_csv with the multithreaded pyarrow parser, falling back to the C parser.
+
+    path may also be a seekable binary file object, such as an upload stream.
+    """
+    start = path.tell() if hasattr(path, 'seek') else None
+    try:
+        return pd.read_csv(path, engine='pyarrow', **kwargs)
+    except (ImportError, ValueError):
+        # pyarrow not installed, or an option/file layout it can't handle
+        if start is not None:
+            path.seek(start)
+        return pd.read_csv(path, engine='c', low_memory=False, cache_dates=True, **kwargs)
+
+_file_cache = {}
+_file_cache_lock = threading.Lock()
+
+def _read_file_cached(path, loader):
+    """Return loader(path), re-running it only when the file's mtime or size changes."""
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    key = (path, loader)
+    with _file_cache_lock:
+        cached = _file_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        value = loader(path)
+        _file_cache[key] = (version, value)
+        return value
+
+def _parquet_sidecar_path(path):
+    """Return the path of the Parquet copy kept next to a CSV file."""
+    return os.path.splitext(path)[0] + '.parquet'
+
+def read_csv_columnar(path):
+    """Load a CSV file through a Parquet copy of it, rebuilding the copy whenever the CSV is newer.
+
+    Parquet loads are several times faster than re-parsing the CSV text and keep the parsed
+    dtypes, so only the first load after the CSV changes pays the CSV parsing cost.
+    """
+    sidecar = _parquet_sidecar_path(path)
+    try:
+        if os.stat(sidecar).st_mtime_ns >= os.stat(path).st_mtime_ns:
+            return pd.read_parquet(sidecar)
+    except FileNotFoundError:
+        pass
+    except (ImportError, ValueError, OSError):
+        # Unreadable copy (or no Parquet engine) - fall back to the CSV and rewrite it
+        pass
+    
+    df = read_csv_fast(path)
+    try:
+        # Write under a temporary name so other workers never see a half-written file
+        tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, sidecar)
+    except (ImportError, ValueError, TypeError, OSError):
+        # Mixed-type columns Arrow can't store, or a read-only directory; the CSV still works
+        pass
+    return df
+
+# Rows formatted per write when saving large contact CSVs
+CSV_WRITE_CHUNK_ROWS = 50_000
+
+def save_csv(df, path):
+    """Write a frame to CSV in row chunks, bounding the size of the formatted text held in memory.
+
+    The Parquet copy is left alone; read_csv_columnar rebuilds it from the CSV on the next read
+    so both loaders see the same parsed dtypes.
+    """
+    df.to_csv(path, index=False, chunksize=CSV_WRITE_CHUNK_ROWS)
+
+def read_csv_cached(path):
+    """Return the DataFrame for a CSV file, re-loading it only when the file changes.
+
+    The frame is shared between requests, so callers must not modify it in place.
+    """
+    return _read_file_cached(path, read_csv_columnar)
+
+def _load_json(path):
+    """Parse a JSON file."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def read_json_cached(path):
+    """Return the parsed contents of a JSON file, re-reading it only when the file changes.
+
+    Raises FileNotFoundError like open() does. The result is shared between requests,
+    so callers must not modify it in place.
+    """
+    return _read_file_cached(path, _load_json)
@@ -4,57 +4,115 @@ Database configuration and initialization for the referral system.
 """
 
 import os
-from flask import Flask
+from flask import Flask, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from models import db, Organisation, User, Contact, EmployeeContact, JobDescription, Referral
 from datetime import datetime
 import pandas as pd
 import json
+from cache_utils import TTLCache
 
-def init_database(app):
-    """Initialize the database with Flask app."""
-    try:
-        # Database configuration - prefer public URL for Railway
-        database_url = os.environ.get('DATABASE_PUBLIC_URL') or os.environ.get('DATABASE_URL')
-        print(f"🔍 DATABASE_URL found: {bool(database_url)}")
+# Dashboard statistics are re-read on every page load; 60s staleness is acceptable
+ORGANISATION_STATS_TTL_SECONDS = 60
+_organisation_stats_cache = TTLCache(ORGANISATION_STATS_TTL_SECONDS)
+
+def get_database_url():
+    """Resolve the database URL from the environment (PostgreSQL on Railway, SQLite locally)."""
+    # Database configuration - prefer public URL for Railway
+    database_url = os.environ.get('DATABASE_PUBLIC_URL') or os.environ.get('DATABASE_URL')
+    print(f"🔍 DATABASE_URL found: {bool(database_url)}")
+    
+    if database_url:
+        # Railway PostgreSQL - fix internal hostname issue
+        if database_url.startswith('postgres://'):
+            database_url = database_url.replace('postgres://', 'postgresql://', 1)
         
-        if database_url:
-            # Railway PostgreSQL - fix internal hostname issue
-            if database_url.startswith('postgres://'):
-                database_url = database_url.replace('postgres://', 'postgresql://', 1)
-            
-            # Fix Railway internal hostname issue
-            if 'postgres.railway.internal' in database_url:
-                print("⚠️ Detected internal Railway hostname, attempting to fix...")
-                # Try to get the public URL first
-                public_url = os.environ.get('DATABASE_PUBLIC_URL')
-                if public_url:
-                    database_url = public_url
-                    print("✅ Using DATABASE_PUBLIC_URL instead")
+        # Fix Railway internal hostname issue
+        if 'postgres.railway.internal' in database_url:
+            print("⚠️ Detected internal Railway hostname, attempting to fix...")
+            # Try to get the public URL first
+            public_url = os.environ.get('DATABASE_PUBLIC_URL')
+            if public_url:
+                database_url = public_url
+                print("✅ Using DATABASE_PUBLIC_URL instead")
+            else:
+                # Try to get the external hostname from Railway
+                railway_host = os.environ.get('RAILWAY_DATABASE_HOST')
+                if railway_host:
+                    database_url = database_url.replace('postgres.railway.internal', railway_host)
+                    print(f"✅ Updated hostname to: {railway_host}")
                 else:
-                    # Try to get the external hostname from Railway
-                    railway_host = os.environ.get('RAILWAY_DATABASE_HOST')
-                    if railway_host:
-                        database_url = database_url.replace('postgres.railway.internal', railway_host)
-                        print(f"✅ Updated hostname to: {railway_host}")
-                    else:
-                        print("❌ No RAILWAY_DATABASE_HOST found, connection may fail")
-            
-            app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-            print("✅ Using PostgreSQL database")
-        else:
-            # Local development
-            app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///referral_system.db'
-            print("⚠️ Using SQLite for local development")
-        
-        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-            'pool_pre_ping': True,
-            'pool_recycle': 300,
-            'pool_timeout': 20,
-            'max_overflow': 0,
-        }
+                    print("❌ No RAILWAY_DATABASE_HOST found, connection may fail")
         
-        # Database is already initialized in app.py, no need to init again
+        print("✅ Using PostgreSQL database")
+        return database_url
+    
+    # Local development
+    print("⚠️ Using SQLite for local development")
+    return 'sqlite:///referral_system.db'
+
+# Connections the app may hold across all gunicorn workers; keep it under the server's
+# max_connections, which managed PostgreSQL plans share with migrations and admin tools
+DATABASE_MAX_CONNECTIONS = int(os.environ.get('DATABASE_MAX_CONNECTIONS', '20'))
+# Each worker's share of that budget (gunicorn.conf.py reads the same WEB_CONCURRENCY)
+DATABASE_CONNECTIONS_PER_WORKER = max(2, DATABASE_MAX_CONNECTIONS // int(os.environ.get('WEB_CONCURRENCY', '1')))
+
+# Connection pool settings, sized for gevent workers where many requests share one process's pool.
+# LIFO checkout keeps a small set of warm connections busy and lets idle extras time out.
+DATABASE_ENGINE_OPTIONS = {
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+    'pool_timeout': 20,
+    'pool_size': DATABASE_CONNECTIONS_PER_WORKER // 2,
+    'max_overflow': DATABASE_CONNECTIONS_PER_WORKER - DATABASE_CONNECTIONS_PER_WORKER // 2,
+    'pool_use_lifo': True,
+}
+
+# Server-side cap on any single request statement so a slow query can't pin a pooled connection
+DATABASE_STATEMENT_TIMEOUT_MS = int(os.environ.get('DATABASE_STATEMENT_TIMEOUT_MS', '5000'))
+# Endpoints whose bulk writes may legitimately run past the statement timeout
+STATEMENT_TIMEOUT_EXEMPT_ENDPOINTS = {'import_contacts'}
+
+@event.listens_for(db.session, 'after_begin')
+def _set_request_statement_timeout(session, transaction, connection):
+    """Apply the statement timeout (SET LOCAL, so for this transaction only) while serving a request.
+    
+    Startup DDL, migrations and background jobs run outside a request and keep no timeout.
+    """
+    if connection.dialect.name != 'postgresql' or not has_request_context():
+        return
+    if request.endpoint in STATEMENT_TIMEOUT_EXEMPT_ENDPOINTS:
+        return
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {DATABASE_STATEMENT_TIMEOUT_MS}")
+
+# Options only a server database's queue pool takes; SQLite's default pools reject them
+DATABASE_POOL_SIZING_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_use_lifo')
+
+def get_engine_options(database_url):
+    """Engine options (connection pool settings) for the given URL."""
+    options = dict(DATABASE_ENGINE_OPTIONS)
+    if make_url(database_url).get_backend_name() == 'sqlite':
+        for option in DATABASE_POOL_SIZING_OPTIONS:
+            options.pop(option)
+    return options
+
+def configure_database(app):
+    """Configure the connection pool and register the request-scoped session with the app."""
+    if 'sqlalchemy' in app.extensions:
+        # Engine already created by the app - options must be set before db.init_app()
+        return
+    
+    database_url = get_database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = get_engine_options(database_url)
+    db.init_app(app)
+
+def init_database(app):
+    """Initialize the database with Flask app."""
+    try:
+        configure_database(app)
         
         with app.app_context():
             print("🔄 Creating database tables...")
@@ -337,6 +395,28 @@ def get_organisation_contacts_for_job(organisation_id, job_description=None):
     print(f"🏢 ORGANIZATION CONTACTS: Found {len(contacts)} contacts uploaded by ANY employee in org {organisation_id}")
     return contacts
 
+def get_organisation_contact_sample(organisation_id, limit=5):
+    """
+    SECURE: Return (first_name, last_name, company, position) rows for a few of an organisation's contacts.
+    Only the displayed columns are selected and the limit is applied in SQL.
+    """
+    org_contact_ids = db.session.query(EmployeeContact.contact_id).filter(
+        EmployeeContact.organisation_id == organisation_id
+    )
+    return db.session.query(
+        Contact.first_name, Contact.last_name, Contact.company, Contact.position
+    ).filter(
+        Contact.id.in_(org_contact_ids)
+    ).limit(limit).all()
+
+def get_organisation_contacts_version(organisation_id):
+    """Return (link count, newest link time) for an organisation's contacts; changes whenever contacts are linked or removed."""
+    return db.session.query(
+        db.func.count(EmployeeContact.id), db.func.max(EmployeeContact.created_at)
+    ).filter(
+        EmployeeContact.organisation_id == organisation_id
+    ).one()
+
 def get_employee_contacts_for_job(employee_id, job_description=None):
     """
     SECURE: Get contacts uploaded by a SPECIFIC employee only.
@@ -359,7 +439,19 @@ def get_employee_contacts_for_job(employee_id, job_description=None):
     return contacts
 
 def get_organisation_stats(organisation_id):
-    """Get statistics for an organisation."""
+    """Get statistics for an organisation (cached briefly per worker)."""
+    stats = _organisation_stats_cache.get(organisation_id)
+    if stats is None:
+        stats = _load_organisation_stats(organisation_id)
+        _organisation_stats_cache.set(organisation_id, stats)
+    return dict(stats)
+
+def invalidate_organisation_stats(organisation_id):
+    """Drop cached statistics after contacts, employees or jobs change."""
+    _organisation_stats_cache.pop(organisation_id)
+
+def _load_organisation_stats(organisation_id):
+    """Count an organisation's contacts, employees and jobs."""
     total_contacts = db.session.query(Contact).join(EmployeeContact).filter(
         EmployeeContact.organisation_id == organisation_id
     ).count()
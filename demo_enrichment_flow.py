@@ -40,7 +40,7 @@ def demo_enrichment_flow():
     tagged_contacts = tagger.tag_contacts(sample_contacts)
     
     # Add contact IDs
-    tagged_contacts['contact_id'] = [f"contact_{i}" for i in range(len(tagged_contacts))]
+    tagged_contacts['contact_id'] = 'contact_' + pd.RangeIndex(len(tagged_contacts)).astype(str)
     
     # Save tagged contacts
     tagged_contacts.to_csv('demo_tagged_contacts.csv', index=False)
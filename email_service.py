@@ -4,11 +4,19 @@ Email service for sending referral requests using SendGrid.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
-from sendgrid import SendGridAPIClient
+import requests
+from requests.adapters import HTTPAdapter
 from sendgrid.helpers.mail import Mail, Email, To, Content, HtmlContent
 import json
 
+SENDGRID_SEND_URL = 'https://api.sendgrid.com/v3/mail/send'
+SENDGRID_TIMEOUT = (3.05, 10)
+
+# Bulk sends are network-bound; send to this many employees at once (kept below the HTTP pool size)
+BULK_EMAIL_CONCURRENCY = int(os.getenv('BULK_EMAIL_CONCURRENCY', '8'))
+
 class ReferralEmailService:
     """Service for sending referral request emails via SendGrid."""
     
@@ -18,6 +26,15 @@ class ReferralEmailService:
         self.from_email = os.getenv('FROM_EMAIL', 'recruiting@company.com')
         self.from_name = os.getenv('FROM_NAME', 'Recruiting Team')
         
+        # Shared session so TCP/TLS connections to SendGrid are reused across sends
+        self._http = requests.Session()
+        self._http.mount('https://', HTTPAdapter(pool_connections=20, pool_maxsize=50))
+        if self.api_key:
+            self._http.headers.update({
+                'Authorization': f'Bearer {self.api_key}',
+                'Content-Type': 'application/json'
+            })
+        
         # Employee email mapping for testing
         self.employee_emails = {
             'Aaron Adams': 'treibh1@gmail.com',
@@ -29,6 +46,12 @@ class ReferralEmailService:
         if not self.api_key:
             print("⚠️ Warning: SENDGRID_API_KEY not found. Emails will be logged but not sent.")
     
+    def _send_mail(self, mail: Mail) -> requests.Response:
+        """POST a mail to the SendGrid v3 API over the pooled session."""
+        response = self._http.post(SENDGRID_SEND_URL, json=mail.get(), timeout=SENDGRID_TIMEOUT)
+        response.raise_for_status()
+        return response
+    
     def get_employee_email(self, employee_name: str) -> str:
         """Get the email address for an employee."""
         return self.employee_emails.get(employee_name, f"{employee_name.lower().replace(' ', '.')}@company.com")
@@ -119,8 +142,9 @@ The Recruiting Team"""
         }
     
     def send_referral_email(self, employee_name: str, contacts: List[Dict], 
-                           job_title: str, job_location: str) -> Dict:
-        """Send a referral email to an employee."""
+                           job_title: str, job_location: str,
+                           from_email: Optional[str] = None, from_name: Optional[str] = None) -> Dict:
+        """Send a referral email to an employee, optionally from an organisation's own sender."""
         
         try:
             # Get employee email
@@ -132,19 +156,18 @@ The Recruiting Team"""
             )
             
             # Create email
-            from_email = Email(self.from_email, self.from_name)
+            sender = Email(from_email or self.from_email, from_name or self.from_name)
             to_email_obj = To(to_email, employee_name)
             subject = email_content['subject']
             html_content = HtmlContent(email_content['html_body'])
             text_content = Content("text/plain", email_content['text_body'])
             
-            mail = Mail(from_email, to_email_obj, subject, text_content)
+            mail = Mail(sender, to_email_obj, subject, text_content)
             mail.add_content(html_content)
             
             # Send email if API key is available
             if self.api_key:
-                sg = SendGridAPIClient(api_key=self.api_key)
-                response = sg.send(mail)
+                response = self._send_mail(mail)
                 
                 return {
                     'success': True,
@@ -180,7 +203,8 @@ The Recruiting Team"""
             }
     
     def send_bulk_referral_emails(self, contacts_by_employee: Dict[str, List[Dict]], 
-                                 job_title: str, job_location: str) -> Dict:
+                                 job_title: str, job_location: str,
+                                 from_email: Optional[str] = None, from_name: Optional[str] = None) -> Dict:
         """Send bulk referral emails to multiple employees."""
         
         results = []
@@ -189,9 +213,19 @@ The Recruiting Team"""
         
         print(f"📧 Sending bulk referral emails to {len(contacts_by_employee)} employees...")
         
-        for employee_name, contacts in contacts_by_employee.items():
-            if contacts:  # Only send if there are contacts
-                result = self.send_referral_email(employee_name, contacts, job_title, job_location)
+        # Only send if there are contacts
+        recipients = [(name, contacts) for name, contacts in contacts_by_employee.items() if contacts]
+        
+        def send(recipient):
+            employee_name, contacts = recipient
+            return self.send_referral_email(
+                employee_name, contacts, job_title, job_location,
+                from_email=from_email, from_name=from_name
+            )
+        
+        # Send concurrently over the shared connection pool; map() keeps results in input order
+        with ThreadPoolExecutor(max_workers=max(1, min(BULK_EMAIL_CONCURRENCY, len(recipients)))) as executor:
+            for result in executor.map(send, recipients):
                 results.append(result)
                 total_emails += 1
                 
@@ -211,8 +245,9 @@ The Recruiting Team"""
         }
     
     def send_team_invitation_email(self, employee_name: str, employee_email: str, 
-                                 role: str, company_name: str, inviter_name: str) -> Dict:
-        """Send team invitation email to new team member."""
+                                 role: str, company_name: str, inviter_name: str,
+                                 from_email: Optional[str] = None, from_name: Optional[str] = None) -> Dict:
+        """Send team invitation email to new team member, optionally from an organisation's own sender."""
         
         try:
             # Email subject
@@ -278,18 +313,17 @@ Welcome to the team!
 The {company_name} Team"""
             
             # Create email
-            from_email = Email(self.from_email, self.from_name)
+            sender = Email(from_email or self.from_email, from_name or self.from_name)
             to_email_obj = To(employee_email, employee_name)
             html_content = HtmlContent(html_body)
             text_content = Content("text/plain", text_body)
             
-            mail = Mail(from_email, to_email_obj, subject, text_content)
+            mail = Mail(sender, to_email_obj, subject, text_content)
             mail.add_content(html_content)
             
             # Send email if API key is available
             if self.api_key:
-                sg = SendGridAPIClient(api_key=self.api_key)
-                response = sg.send(mail)
+                response = self._send_mail(mail)
                 
                 return {
                     'success': True,
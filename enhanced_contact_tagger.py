@@ -11,6 +11,7 @@ from collections import Counter
 from rapidfuzz import process, fuzz
 from typing import Dict, List, Tuple, Optional
 import time
+from cache_utils import save_csv
 
 class EnhancedContactTagger:
     """
@@ -386,7 +387,7 @@ class EnhancedContactTagger:
     
     def save_tagged_contacts(self, tagged_df: pd.DataFrame, filename: str = "enhanced_tagged_contacts.csv"):
         """Save tagged contacts to CSV file."""
-        tagged_df.to_csv(filename, index=False)
+        save_csv(tagged_df, filename)
         print(f"📄 Tagged contacts saved to {filename}")
         
         # Print summary statistics
@@ -0,0 +1,19 @@
+"""
+Gunicorn configuration for the referral system.
+Uses gevent workers so I/O-bound endpoints (SendGrid calls, job page
+fetches, database round trips) don't each pin a whole worker process.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = 'gevent'
+# One process by default: gevent supplies the concurrency, the in-process caches stay coherent,
+# and database.py divides its connection budget by this same WEB_CONCURRENCY value
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', '1000'))
+
+def post_fork(server, worker):
+    """Make psycopg2 cooperate with gevent so queries yield instead of blocking the worker."""
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
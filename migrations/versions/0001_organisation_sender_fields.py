@@ -0,0 +1,36 @@
+"""Add sender email fields to organisations
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-08-20 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+SENDER_COLUMNS = ('from_email', 'from_name')
+
+def _existing_columns(table_name):
+    """Return the column names currently present on a table."""
+    inspector = sa.inspect(op.get_bind())
+    return {column['name'] for column in inspector.get_columns(table_name)}
+
+def upgrade():
+    # A fresh database gets the full schema from db.create_all() when the app starts
+    if not sa.inspect(op.get_bind()).has_table('organisations'):
+        return
+    
+    # Databases patched via /api/migrate-database already have these columns
+    existing = _existing_columns('organisations')
+    for column_name in SENDER_COLUMNS:
+        if column_name not in existing:
+            op.add_column('organisations', sa.Column(column_name, sa.String(255), nullable=True))
+
+def downgrade():
+    for column_name in SENDER_COLUMNS:
+        op.drop_column('organisations', column_name)
@@ -0,0 +1,56 @@
+"""Add referral request workflow fields
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-08-21 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+REQUEST_COLUMNS = (
+    ('requester_id', sa.String(36)),
+    ('employee_id', sa.String(36)),
+    ('job_title', sa.String(255)),
+    ('job_description', sa.Text()),
+    ('requester_message', sa.Text()),
+    ('employee_message', sa.Text()),
+    ('updated_at', sa.DateTime()),
+)
+
+def _existing_columns(table_name):
+    """Return the column names currently present on a table."""
+    inspector = sa.inspect(op.get_bind())
+    return {column['name'] for column in inspector.get_columns(table_name)}
+
+def upgrade():
+    # A fresh database gets the full schema from db.create_all() when the app starts
+    if not sa.inspect(op.get_bind()).has_table('referrals'):
+        return
+    
+    existing = _existing_columns('referrals')
+    for column_name, column_type in REQUEST_COLUMNS:
+        if column_name not in existing:
+            op.add_column('referrals', sa.Column(column_name, column_type, nullable=True))
+    
+    if 'requester_id' not in existing:
+        op.create_foreign_key('fk_referrals_requester', 'referrals', 'users', ['requester_id'], ['id'])
+    if 'employee_id' not in existing:
+        op.create_foreign_key('fk_referrals_employee', 'referrals', 'users', ['employee_id'], ['id'])
+    
+    # Referral requests are made against free-text job titles, not stored job descriptions
+    op.alter_column('referrals', 'job_id', existing_type=sa.String(36), nullable=True)
+    op.alter_column('referrals', 'referrer_id', existing_type=sa.String(36), nullable=True)
+
+def downgrade():
+    op.alter_column('referrals', 'referrer_id', existing_type=sa.String(36), nullable=False)
+    op.alter_column('referrals', 'job_id', existing_type=sa.String(36), nullable=False)
+    op.drop_constraint('fk_referrals_employee', 'referrals', type_='foreignkey')
+    op.drop_constraint('fk_referrals_requester', 'referrals', type_='foreignkey')
+    for column_name, _ in reversed(REQUEST_COLUMNS):
+        op.drop_column('referrals', column_name)
@@ -0,0 +1,41 @@
+"""Add unique index on organisation name
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-08-22 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # A fresh database gets the full schema from db.create_all() when the app starts
+    if not inspector.has_table('organisations'):
+        return
+    
+    existing = {index['name'] for index in inspector.get_indexes('organisations')}
+    if 'uq_organisations_name' in existing:
+        return
+    
+    # Duplicate names would make the index fail mid-release; renaming or merging organisations
+    # needs a human decision, so stop with the names that need resolving
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT name, COUNT(*) FROM organisations GROUP BY name HAVING COUNT(*) > 1 ORDER BY name"
+    )).fetchall()
+    if duplicates:
+        names = ', '.join(f"'{name}' ({count} rows)" for name, count in duplicates)
+        raise RuntimeError(
+            f"Cannot add unique index uq_organisations_name: duplicate organisation names {names}. "
+            "Rename or merge these organisations, then re-run 'alembic upgrade head'."
+        )
+    
+    op.create_index('uq_organisations_name', 'organisations', ['name'], unique=True)
+
+def downgrade():
+    op.drop_index('uq_organisations_name', table_name='organisations')
@@ -0,0 +1,37 @@
+"""Add indexes for per-organisation lookups
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-08-22 00:00:00
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_employee_contacts_contact_org', 'employee_contacts', ['contact_id', 'organisation_id']),
+    ('ix_users_organisation_id', 'users', ['organisation_id']),
+    ('ix_job_descriptions_organisation_id', 'job_descriptions', ['organisation_id']),
+]
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # CONCURRENTLY cannot run inside a transaction; build without locking out writes
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            # A fresh database gets the full schema from db.create_all() when the app starts
+            if not inspector.has_table(table):
+                continue
+            existing = {index['name'] for index in inspector.get_indexes(table)}
+            if name not in existing:
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -4,9 +4,15 @@ Secure multi-tenant database models for the referral system.
 Implements GDPR-compliant contact management with no directory access.
 """
 
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import insert, update
 from datetime import datetime, timedelta
+import atexit
+import queue
+import threading
+import time
 import uuid
 import hashlib
 import secrets
@@ -30,6 +36,9 @@ class Organisation(db.Model):
     users = db.relationship('User', backref='organisation', lazy=True)
     job_descriptions = db.relationship('JobDescription', backref='organisation', lazy=True)
     
+    # Company names are unique so registration races fail at the database
+    __table_args__ = (db.Index('uq_organisations_name', 'name', unique=True),)
+    
     def __repr__(self):
         return f'<Organisation {self.name}>'
 
@@ -50,10 +59,13 @@ class User(UserMixin, db.Model):
     
     # Relationships
     employee_contacts = db.relationship('EmployeeContact', backref='employee', lazy=True)
-    referrals_sent = db.relationship('Referral', backref='referrer', lazy=True)
+    referrals_sent = db.relationship('Referral', backref='referrer', lazy=True, foreign_keys='Referral.referrer_id')
     sessions = db.relationship('UserSession', backref='user', lazy=True)
     audit_logs = db.relationship('AuditLog', backref='user', lazy=True)
     
+    # Team listings and dashboards filter users by organisation
+    __table_args__ = (db.Index('ix_users_organisation_id', 'organisation_id'),)
+    
     def __repr__(self):
         return f'<User {self.name} ({self.email})>'
     
@@ -133,8 +145,11 @@ class EmployeeContact(db.Model):
     relationship_type = db.Column(db.String(100), default='linkedin_connection')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Ensure unique employee-contact relationships
-    __table_args__ = (db.UniqueConstraint('employee_id', 'contact_id'),)
+    # Ensure unique employee-contact relationships; referral lookups go by contact within an organisation
+    __table_args__ = (
+        db.UniqueConstraint('employee_id', 'contact_id'),
+        db.Index('ix_employee_contacts_contact_org', 'contact_id', 'organisation_id'),
+    )
     
     def __repr__(self):
         return f'<EmployeeContact {self.employee_id} -> {self.contact_id}>'
@@ -156,6 +171,8 @@ class JobDescription(db.Model):
     # Relationships
     referrals = db.relationship('Referral', backref='job', lazy=True)
     
+    __table_args__ = (db.Index('ix_job_descriptions_organisation_id', 'organisation_id'),)
+    
     def __repr__(self):
         return f'<JobDescription {self.title}>'
 
@@ -164,16 +181,35 @@ class Referral(db.Model):
     __tablename__ = 'referrals'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    job_id = db.Column(db.String(36), db.ForeignKey('job_descriptions.id'), nullable=False)
+    job_id = db.Column(db.String(36), db.ForeignKey('job_descriptions.id'), nullable=True)
     contact_id = db.Column(db.String(36), db.ForeignKey('contacts.id'), nullable=False)
-    referrer_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    referrer_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
     organisation_id = db.Column(db.String(36), db.ForeignKey('organisations.id'), nullable=False)
     
+    # Request workflow: a requester asks the employee who knows the contact for a referral
+    requester_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
+    employee_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
+    job_title = db.Column(db.String(255), nullable=True)
+    job_description = db.Column(db.Text, nullable=True)
+    requester_message = db.Column(db.Text, nullable=True)
+    employee_message = db.Column(db.Text, nullable=True)
+    
     status = db.Column(db.String(50), default='pending')  # pending, sent, accepted, declined
     message = db.Column(db.Text, nullable=True)
     sent_at = db.Column(db.DateTime, nullable=True)
     responded_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships (contact comes from the Contact.referrals backref)
+    requester = db.relationship('User', foreign_keys=[requester_id])
+    employee = db.relationship('User', foreign_keys=[employee_id])
+    
+    # My-referrals lists filter by requester or employee within an organisation
+    __table_args__ = (
+        db.Index('ix_referrals_requester_org', 'requester_id', 'organisation_id'),
+        db.Index('ix_referrals_employee_org', 'employee_id', 'organisation_id'),
+    )
     
     def __repr__(self):
         return f'<Referral {self.job_id} -> {self.contact_id}>'
@@ -252,17 +288,30 @@ class UserSession(db.Model):
             return session
         return None
     
+    @staticmethod
+    def deactivate_by_token(session_token):
+        """Deactivate an active session in one UPDATE; returns its (id, user_id, organisation_id) or None."""
+        row = db.session.execute(
+            update(UserSession).where(
+                UserSession.session_token == session_token,
+                UserSession.is_active.is_(True),
+                UserSession.expires_at >= datetime.utcnow()
+            ).values(is_active=False).returning(
+                UserSession.id, UserSession.user_id, UserSession.organisation_id
+            ).execution_options(synchronize_session=False)
+        ).first()
+        db.session.commit()
+        return row
+    
     @staticmethod
     def cleanup_expired_sessions():
-        """Clean up expired sessions."""
-        expired_sessions = UserSession.query.filter(
-            UserSession.expires_at < datetime.utcnow()
-        ).all()
-        
-        for session in expired_sessions:
-            session.deactivate()
-        
-        return len(expired_sessions)
+        """Deactivate every expired session that is still active in one UPDATE; returns the count."""
+        count = UserSession.query.filter(
+            UserSession.expires_at < datetime.utcnow(),
+            UserSession.is_active.is_(True)
+        ).update({UserSession.is_active: False}, synchronize_session=False)
+        db.session.commit()
+        return count
 
 class AuditLog(db.Model):
     """Comprehensive audit logging for security and compliance."""
@@ -300,26 +349,82 @@ class AuditLog(db.Model):
     def log_event(user_id, organisation_id, session_id, event_type, event_category, 
                   description, success=True, ip_address=None, user_agent=None, 
                   endpoint=None, method=None, error_message=None, event_metadata=None):
-        """Log an audit event."""
-        log = AuditLog(
-            user_id=user_id,
-            organisation_id=organisation_id,
-            session_id=session_id,
-            event_type=event_type,
-            event_category=event_category,
-            event_description=description,
-            success=success,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            endpoint=endpoint,
-            method=method,
-            error_message=error_message,
-            event_metadata=event_metadata
-        )
-        
-        db.session.add(log)
-        db.session.commit()
-        return log
+        """Queue an audit event; a background writer inserts queued events in batches."""
+        _audit_queue.put({
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'organisation_id': organisation_id,
+            'session_id': session_id,
+            'event_type': event_type,
+            'event_category': event_category,
+            'event_description': description,
+            'success': success,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'endpoint': endpoint,
+            'method': method,
+            'error_message': error_message,
+            'event_metadata': event_metadata,
+            'created_at': datetime.utcnow()
+        })
+        _start_audit_writer(current_app._get_current_object())
+
+# Audit events are written off the request path: log_event only enqueues, and one
+# daemon thread per process turns whatever has queued up into a multi-row INSERT
+AUDIT_BATCH_SIZE = 500
+AUDIT_FLUSH_INTERVAL_SECONDS = 0.25
+
+_audit_queue = queue.SimpleQueue()
+_audit_app = None
+_audit_writer_lock = threading.Lock()
+
+def _start_audit_writer(app):
+    """Start the audit writer thread on first use."""
+    global _audit_app
+    if _audit_app is not None:
+        return
+    with _audit_writer_lock:
+        if _audit_app is None:
+            _audit_app = app
+            threading.Thread(target=_run_audit_writer, name='audit-writer', daemon=True).start()
+            atexit.register(flush_audit_events)
+
+def _run_audit_writer():
+    """Write queued audit events in batches until the process exits."""
+    while True:
+        batch = [_audit_queue.get()]
+        _drain_audit_queue(batch)
+        _write_audit_batch(batch)
+        time.sleep(AUDIT_FLUSH_INTERVAL_SECONDS)
+
+def _drain_audit_queue(batch):
+    """Move already-queued events into batch, up to AUDIT_BATCH_SIZE."""
+    while len(batch) < AUDIT_BATCH_SIZE:
+        try:
+            batch.append(_audit_queue.get_nowait())
+        except queue.Empty:
+            break
+
+def _write_audit_batch(batch):
+    """Insert a batch of audit events in one statement and commit."""
+    with _audit_app.app_context():
+        try:
+            db.session.execute(insert(AuditLog), batch)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Failed to write {len(batch)} audit events: {e}")
+
+def flush_audit_events():
+    """Write any queued audit events now (called at exit)."""
+    if _audit_app is None:
+        return
+    while True:
+        batch = []
+        _drain_audit_queue(batch)
+        if not batch:
+            return
+        _write_audit_batch(batch)
 
 class RateLimit(db.Model):
     """Rate limiting for security."""
@@ -338,40 +443,57 @@ class RateLimit(db.Model):
     @staticmethod
     def check_rate_limit(identifier, action, max_attempts=20, window_minutes=60):
         """Check if rate limit is exceeded."""
-        window_start = datetime.utcnow() - timedelta(minutes=window_minutes)
+        now = datetime.utcnow()
+        window_start = now - timedelta(minutes=window_minutes)
         
-        # Clean up old entries
-        RateLimit.query.filter(RateLimit.window_start < window_start).delete()
-        
-        # Check current rate limit
+        # Check current rate limit (one indexed lookup for this identifier only)
         rate_limit = RateLimit.query.filter_by(
             identifier=identifier,
             action=action
         ).first()
         
+        # An expired window starts over, reusing the row instead of deleting and re-inserting it
+        if rate_limit and rate_limit.window_start < window_start and not (
+            rate_limit.blocked_until and rate_limit.blocked_until > now
+        ):
+            rate_limit.attempts = 0
+            rate_limit.window_start = now
+            rate_limit.blocked_until = None
+        
         if rate_limit:
-            if rate_limit.blocked_until and rate_limit.blocked_until > datetime.utcnow():
+            if rate_limit.blocked_until and rate_limit.blocked_until > now:
                 return False, f"Rate limit exceeded. Blocked until {rate_limit.blocked_until}"
             
             if rate_limit.attempts >= max_attempts:
                 # Block for only 15 minutes instead of 1 hour
-                rate_limit.blocked_until = datetime.utcnow() + timedelta(minutes=15)
+                rate_limit.blocked_until = now + timedelta(minutes=15)
                 db.session.commit()
                 return False, "Rate limit exceeded. Blocked for 15 minutes."
             
             rate_limit.attempts += 1
-            db.session.commit()
         else:
             rate_limit = RateLimit(
                 identifier=identifier,
                 action=action,
-                attempts=1
+                attempts=1,
+                window_start=now
             )
             db.session.add(rate_limit)
-            db.session.commit()
         
+        db.session.commit()
         return True, None
     
+    @staticmethod
+    def cleanup_expired(window_minutes=60):
+        """Delete rate-limit rows whose window has passed and that aren't blocking anyone."""
+        now = datetime.utcnow()
+        count = RateLimit.query.filter(
+            RateLimit.window_start < now - timedelta(minutes=window_minutes),
+            db.or_(RateLimit.blocked_until.is_(None), RateLimit.blocked_until <= now)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return count
+    
     @staticmethod
     def reset_rate_limit(identifier, action):
         """Reset rate limit for identifier."""
@@ -478,3 +600,45 @@ def upload_contact_to_organisation(contact_data, employee_id, organisation_id):
     db.session.commit()
     
     return contact
+
+# Employee-contact links written per INSERT statement during imports
+CONTACT_LINK_BATCH_SIZE = 1000
+
+def link_contacts_to_employee(employee_links):
+    """Link contacts to employees, skipping pairs that are already linked.
+    
+    Uses INSERT ... ON CONFLICT DO NOTHING against the unique
+    (employee_id, contact_id) constraint, one statement per batch of
+    CONTACT_LINK_BATCH_SIZE links. Each batch runs in a savepoint; if it
+    fails, its links are retried one by one and only the bad ones are
+    skipped (and reported), so one bad row never fails the whole import.
+    Returns the number of new links created.
+    """
+    if not employee_links:
+        return 0
+    
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    def insert_links(links):
+        with db.session.begin_nested():
+            stmt = insert(EmployeeContact).values(links).on_conflict_do_nothing(
+                index_elements=['employee_id', 'contact_id']
+            )
+            return db.session.execute(stmt).rowcount
+    
+    created = 0
+    for start in range(0, len(employee_links), CONTACT_LINK_BATCH_SIZE):
+        batch = employee_links[start:start + CONTACT_LINK_BATCH_SIZE]
+        try:
+            created += insert_links(batch)
+        except Exception as e:
+            print(f"Error linking contact batch, retrying row by row: {e}")
+            for link in batch:
+                try:
+                    created += insert_links([link])
+                except Exception as e:
+                    print(f"Error linking contact {link.get('contact_id')}: {e}")
+    return created
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Background task queue for slow outbound work such as SendGrid email sends.
+Tasks run on a small in-process worker pool so HTTP requests can return as
+soon as their database writes are committed.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+EMAIL_TASK_WORKERS = int(os.environ.get('EMAIL_TASK_WORKERS', '4'))
+
+_email_executor = ThreadPoolExecutor(max_workers=EMAIL_TASK_WORKERS, thread_name_prefix='email-task')
+
+def enqueue_email(send_func, description, log=print, **kwargs):
+    """Queue an email send in the background and log its outcome when it completes.
+
+    send_func must return the email service's result dict ({'success': ..., 'error': ...}).
+    Pass plain values in kwargs - ORM objects must not cross into the worker thread.
+    """
+    future = _email_executor.submit(send_func, **kwargs)
+    future.add_done_callback(lambda done: _log_email_result(done, description, log))
+    return future
+
+def _log_email_result(future, description, log):
+    """Log the result of a finished email task."""
+    try:
+        result = future.result()
+    except Exception as e:
+        log(f"⚠️ Email task error ({description}): {str(e)}")
+        return
+
+    if result and result.get('success'):
+        log(f"📧 Email sent: {description}")
+    else:
+        error = result.get('error', 'Unknown error') if result else 'No result'
+        log(f"⚠️ Failed to send email ({description}): {error}")
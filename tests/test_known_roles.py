@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+os.environ.setdefault('SECRET_KEY', 'test')
+
+from app_old import match_to_known_role
+
+
+@pytest.mark.parametrize('title', [
+    'Office Manager',
+    'Sales Manager',
+    'HR Manager',
+    'Program Manager',
+    'Project Manager',
+    'Security Engineer',
+    'Financial Analyst Intern',
+])
+def test_unknown_titles_are_returned_unchanged(title):
+    assert match_to_known_role(title) == title
+
+
+@pytest.mark.parametrize('title, expected', [
+    ('customer success manager', 'Customer Success Manager'),
+    ('Senior Software Engineer', 'Software Engineer'),
+    ('Sofware Engineer', 'Software Engineer'),
+    ('Product Manger', 'Product Manager'),
+])
+def test_known_roles_still_match(title, expected):
+    assert match_to_known_role(title) == expected
@@ -1,11 +1,14 @@
 import pandas as pd
+import ast
 import json
 from collections import Counter
+from functools import lru_cache
 import re
 from rapidfuzz import process, fuzz
 from typing import Dict, List, Tuple, Optional, Set
 import time
 from location_hierarchy import location_hierarchy, LocationMatchType
+from cache_utils import read_csv_cached, save_csv
 
 try:
 	from bright_data_enricher import BrightDataEnricher
@@ -13,6 +16,11 @@ try:
 except Exception:
 	_HAS_BRIGHT = False
 
+@lru_cache(maxsize=65536)
+def _parse_tag_list(text: str) -> frozenset:
+    """Parse a stored tag list such as "['python', 'sql']", memoized across contacts and requests."""
+    return frozenset(ast.literal_eval(text))
+
 class UnifiedReferralMatcher:
     """
     Unified system for matching job descriptions to potential referral candidates.
@@ -24,7 +32,8 @@ class UnifiedReferralMatcher:
         print("🚀 Initializing Unified Referral Matcher...")
         
         # Load contacts
-        self.df = pd.read_csv(contacts_file)
+        # Shared parsed frame (Parquet-backed); copied because location enrichment writes into self.df
+        self.df = read_csv_cached(contacts_file).copy()
         print(f"📊 Loaded {len(self.df)} contacts from {contacts_file}")
         
         # Load enrichment data
@@ -227,10 +236,10 @@ class UnifiedReferralMatcher:
             preferred_industries: List of preferred industries for bonus scoring
         """
         # Extract contact data
-        contact_skills = eval(contact_row.get("skills_tag", "[]"))
+        contact_skills = _parse_tag_list(contact_row.get("skills_tag", "[]"))
         contact_title = str(contact_row.get("Position", "")).lower()
         contact_company = str(contact_row.get("Company", "")).lower().strip()
-        contact_company_tags = eval(contact_row.get("company_industry_tags", "[]"))
+        contact_company_tags = _parse_tag_list(contact_row.get("company_industry_tags", "[]"))
         contact_seniority = str(contact_row.get("seniority_tag", "")).lower()
         contact_function = str(contact_row.get("function_tag", "")).lower()
         
@@ -1160,7 +1169,8 @@ class UnifiedReferralMatcher:
         print(f"   Min total score: {thresholds['min_total_score']}")
         print(f"   Exclude seniority: {thresholds['exclude_seniority']}")
         
-        for idx, row in self.df.iterrows():
+        # Plain dicts per row: iterrows() would build a pandas Series for every contact
+        for row in self.df.to_dict('records'):
             scores = self.score_contact(row, job_reqs, preferred_companies, preferred_industries, job_location, job_title, alternative_titles)
             
             # Apply role-based filtering
@@ -1434,7 +1444,7 @@ class UnifiedReferralMatcher:
                 df.at[contact_index, 'Location'] = new_location
                 
                 # Save back to file
-                df.to_csv(self.contacts_file, index=False)
+                save_csv(df, self.contacts_file)
                 print(f"   💾 Updated database: Contact {contact_index} location set to '{new_location}'")
             else:
                 print(f"   ⚠️ Contact index {contact_index} out of range for database update")
@@ -9,6 +9,7 @@ import uuid
 from datetime import datetime
 from typing import Dict, List, Optional
 import pandas as pd
+from cache_utils import read_csv_cached, read_json_cached
 
 class UserManager:
     def __init__(self, users_file: str = "users.json", contacts_ownership_file: str = "contact_ownership.json"):
@@ -123,8 +124,7 @@ class UserManager:
     def get_pending_referrals(self, user_id: str) -> List[Dict]:
         """Get pending referral requests for a user."""
         try:
-            with open("referral_requests.json", 'r') as f:
-                referrals = json.load(f)
+            referrals = read_json_cached("referral_requests.json")
         except FileNotFoundError:
             return []
         
@@ -169,24 +169,23 @@ class UserManager:
     def get_user_contacts_for_enrichment(self, user_id: str) -> List[Dict]:
         """Get contacts for enrichment interface with current data."""
         try:
-            # Load the enhanced tagged contacts
-            contacts_df = pd.read_csv('enhanced_tagged_contacts.csv')
+            # Load the enhanced tagged contacts (parsed once, shared until the file changes)
+            contacts_df = read_csv_cached('enhanced_tagged_contacts.csv')
             
             # Get user's contact IDs
             user_contact_ids = self.get_user_contacts(user_id)
             
             # If no contact_id column exists, create one based on index
             if 'contact_id' not in contacts_df.columns:
-                contacts_df['contact_id'] = [f"contact_{i}" for i in range(len(contacts_df))]
+                contacts_df = contacts_df.assign(contact_id='contact_' + pd.RangeIndex(len(contacts_df)).astype(str))
             
             # Filter contacts belonging to this user
             user_contacts = contacts_df[contacts_df['contact_id'].isin(user_contact_ids)]
             
-            # Load existing enrichment data
+            # Load existing enrichment data (re-read only after save_contact_enrichment changes it)
             enrichment_file = f"enrichment_data_{user_id}.json"
             try:
-                with open(enrichment_file, 'r') as f:
-                    enrichment_data = json.load(f)
+                enrichment_data = read_json_cached(enrichment_file)
             except FileNotFoundError:
                 enrichment_data = {}
             